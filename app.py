@@ -1,24 +1,141 @@
 import os
-import pandas as pd
 import asyncio
 import json
-from huggingface_hub import AsyncInferenceClient
-import gradio as gr
 from dotenv import load_dotenv
 import os
-from openai import OpenAI
 from dotenv import load_dotenv
+from utils.context import CONTEXT_TOKEN_BUDGET, build_dependency_context, count_tokens
+from utils.manifest import BuildManifest, content_hash, input_hash
+from utils.llm import hf_generate
+from utils.providers import HedgedRouter, HuggingFaceProvider, OpenAIProvider
+from utils.streaming import FencedBlockStream, split_path_blocks
+from utils.patching import NO_CHANGES, PatchError, apply_patch, validate_content
+from utils.symbols import SymbolIndex
+from utils.metrics import METRICS_HOST, METRICS_PORT, registry, span, start_metrics_server
+from utils.ratelimit import limiter_metrics
+from utils.logger import get_logger, log_artifact, payload
+from utils.fileio import FileWriter
+from utils.jobs import JobManager, current_workspace
+from utils.store import ProjectStore
+from utils.validation import validate_files
+from utils.archive import EntryCache, write_archive
+from utils.json_stream import JsonItemStream, extract_json
+from utils.cache import response_scope
+from utils.scheduler import (
+    build_dependency_graph, file_tier, is_boilerplate, mention_patterns, run_dependency_graph,
+    transitive_dependencies,
+)
 # Load the API key from the .env file
 load_dotenv()
+logger = get_logger(__name__)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 HF_API_KEY = os.getenv("HF_API_KEY")
+# Maximum number of files generated concurrently in Step 2; the rate limiter
+# adapts how many of their requests are actually in flight
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "16"))
+# Maximum number of edit rounds when updating an already generated file
+MAX_UPDATE_ITERATIONS = int(os.getenv("MAX_UPDATE_ITERATIONS", "3"))
+# Use interface stubs instead of full dependency code in prompts
+USE_INTERFACE_STUBS = os.getenv("USE_INTERFACE_STUBS", "true").lower() in ("1", "true", "yes")
+# Start generating leaf files while the Step 1 tree is still streaming
+EXPRESS_MODE = os.getenv("EXPRESS_MODE", "false").lower() in ("1", "true", "yes")
+# Generate small boilerplate files (__init__.py, requirements.txt, configs) several per request
+BATCH_SMALL_FILES = os.getenv("BATCH_SMALL_FILES", "true").lower() in ("1", "true", "yes")
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "8"))
 # --- Utility Functions ---
 
 # Set the base folder for the generated project
 current_directory = os.getcwd()
 project_name = "generated"
-path_project = os.path.join(current_directory, project_name)
-os.makedirs(path_project, exist_ok=True)  # Ensure the folder exists
+path_project = os.path.join(current_directory, project_name)  # Created on first write
+
+# Runs pipeline steps of concurrent Gradio sessions in isolated workspaces
+job_manager = JobManager()
+# File explorer snapshots, keyed by the directory they index
+explorer_indexes = {}
+# Project state stores, keyed by project folder
+project_stores = {}
+# Compressed archive entries, shared by all projects
+archive_cache = EntryCache()
+
+def current_session() -> str:
+    """
+    Return the session ID of the current job, or "local" outside of jobs.
+    """
+    workspace = current_workspace.get()
+    return workspace.session_id if workspace is not None else "local"
+
+def get_project_path() -> str:
+    """
+    Return the project folder of the current job.
+
+    Inside a job started by the job manager this is the session workspace;
+    otherwise (CLI or dev runs) it is the shared `generated` folder.
+    """
+    workspace = current_workspace.get()
+    return workspace.project_dir if workspace is not None else path_project
+
+def get_store() -> ProjectStore:
+    """
+    Return the state store (`project.db`) of the current project.
+    """
+    project_path = get_project_path()
+    store = project_stores.get(project_path)
+    if store is None:
+        # Close the stores of workspaces removed by the job manager
+        for stale_path in [path for path in project_stores if not os.path.isdir(path)]:
+            project_stores.pop(stale_path).close()
+        store = project_stores.setdefault(project_path, ProjectStore(os.path.join(project_path, "project.db")))
+    return store
+
+SYSTEM_PROMPT = "You are a code generator application. Simply return the raw code content based on requests."
+OPENAI_MODEL = "gpt-4o"
+HF_MODEL = "codellama/CodeLlama-34b-Instruct-hf"
+HF_PARAMETERS = {"do_sample": True, "max_new_tokens": 512, "return_full_text": False}
+# "openai", "huggingface", or "hedged" (OpenAI first, Hugging Face as hedge and failover)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai").lower()
+
+def build_router() -> HedgedRouter:
+    """
+    Create the provider router for the configured LLM backend.
+    """
+    if LLM_BACKEND == "huggingface":
+        return HedgedRouter(HuggingFaceProvider(HF_API_KEY, HF_MODEL, HF_PARAMETERS))
+    openai_provider = OpenAIProvider(OPENAI_API_KEY, OPENAI_MODEL)
+    if LLM_BACKEND == "hedged":
+        return HedgedRouter(openai_provider, HuggingFaceProvider(HF_API_KEY, HF_MODEL, HF_PARAMETERS))
+    return HedgedRouter(openai_provider)
+
+llm_router = build_router()
+# Structured output schema of the project tree requested in Step 1
+PROJECT_TREE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "files": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"path": {"type": "string"}, "description": {"type": "string"}},
+                "required": ["path", "description"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["files"],
+    "additionalProperties": False,
+}
+PROJECT_TREE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "project_tree", "strict": True, "schema": PROJECT_TREE_SCHEMA},
+}
+# Settings that change generated output; part of every file's input hash
+GENERATION_SETTINGS = {
+    "backend": LLM_BACKEND,
+    "model": OPENAI_MODEL,
+    "system": SYSTEM_PROMPT,
+    "interface_stubs": USE_INTERFACE_STUBS,
+    "context_budget": CONTEXT_TOKEN_BUDGET,
+}
 
 async def generate_code_hf(prompt: str) -> str:
     """
@@ -30,63 +147,120 @@ async def generate_code_hf(prompt: str) -> str:
     Returns:
         Generated code.
     """
-    client = AsyncInferenceClient(HF_API_KEY)
     try:
-        response = await client.post(
-            model="codellama/CodeLlama-34b-Instruct-hf",
-            inputs=prompt,
-            parameters={"do_sample": True, "max_new_tokens": 512, "return_full_text": False},
+        response = await hf_generate(
+            prompt,
+            api_key=HF_API_KEY,
+            model=HF_MODEL,
+            parameters=HF_PARAMETERS,
         )
-        return response.get("generated_text", "").strip()
+        return response.strip()
     except Exception as e:
         return f"Error: {e}"
-# Load the API key from the .env file
-client = OpenAI(api_key=OPENAI_API_KEY)
-async def generate_code(prompt: str) -> str:
+
+async def generate_code(prompt: str, response_format: dict = None) -> str:
     """
-    Generate code using OpenAI's GPT-4o API based on the provided prompt.
+    Generate code using the configured backend (OpenAI's GPT-4o by default).
 
     Args:
         prompt: The prompt describing the required file or update.
+        response_format: Optional structured output format, e.g. a JSON schema.
 
     Returns:
         Generated code.
     """
-    try:
-        # Create a chat completion using OpenAI's GPT-4o model
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a code generator application. Simply return the raw code content based on requests."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        # Extract and return the generated code from the completion
-        return completion.choices[0].message.content.strip()
-    except Exception as e:
-        # Return an error message in case of failure
-        return f"Error: {e}"
+    with span("generate_code", prompt_tokens=count_tokens(SYSTEM_PROMPT + prompt)) as current:
+        try:
+            # Route the request through the backend router, which hedges and fails over
+            completion = await llm_router.complete(prompt, system=SYSTEM_PROMPT, response_format=response_format)
+            current.set(completion_tokens=count_tokens(completion))
+            # Return the generated code from the completion
+            return completion.strip()
+        except Exception as e:
+            # Return an error message in case of failure
+            current.add("errors")
+            return f"Error: {e}"
+
+async def generate_code_stream(prompt: str, response_format: dict = None):
+    """
+    Stream code from the configured backend based on the provided prompt.
+
+    Args:
+        prompt: The prompt describing the required file or update.
+        response_format: Optional structured output format, e.g. a JSON schema.
+
+    Yields:
+        Chunks of generated text as they arrive.
+    """
+    with span("generate_code", prompt_tokens=count_tokens(SYSTEM_PROMPT + prompt)) as current:
+        chunks = []
+        try:
+            async for chunk in llm_router.stream(prompt, system=SYSTEM_PROMPT, response_format=response_format):
+                if not chunks:
+                    current.set(first_token_seconds=current.duration)
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            # Return an error message in case of failure
+            current.add("errors")
+            yield f"Error: {e}"
+        current.set(completion_tokens=count_tokens("".join(chunks)))
+
+# Atomic writes that skip unchanged files; shared by every session
+file_writer = FileWriter()
+
+def file_target(file_path: str):
+    """
+    Resolve a project file path, creating it right away if it is a directory.
+
+    Returns:
+        The full path of the file, or None for a directory.
+    """
+    full_path = os.path.join(get_project_path(), file_path.lstrip("./"))
+
+    # Check if the path is a directory and create it
+    if full_path.endswith("/") or os.path.basename(full_path) == "":
+        os.makedirs(full_path, exist_ok=True)
+        return None  # No file to write if it's a directory
+    return full_path
+
+def file_saved(full_path: str, content: str, written: bool, current):
+    current.set(bytes_written=len(content.encode("utf-8")) if written else 0, skipped=int(not written))
+    # Keep the file explorer current without a rescan
+    index = get_explorer_index(create=False)
+    if written and index is not None:
+        index.record(full_path, content)
 
 def save_file(file_path: str, content: str):
     """
     Save content to a file.
 
+    The file is replaced atomically, and left untouched (mtime included) if it
+    already holds the content.
+
     Args:
         file_path: The file path where content will be saved.
         content: Content to save.
     """
-    full_path = os.path.join(path_project, file_path.lstrip("./"))
+    full_path = file_target(file_path)
+    if full_path is None:
+        return
+    with span("save_file", path=file_path) as current:
+        file_saved(full_path, content, file_writer.write_sync(full_path, content), current)
 
-    # Check if the path is a directory and create it
-    if full_path.endswith("/") or os.path.basename(full_path) == "":
-        os.makedirs(full_path, exist_ok=True)
-        return  # No file to write if it's a directory
-    # Ensure the parent directory exists
-    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+async def save_file_async(file_path: str, content: str):
+    """
+    Save content to a file like `save_file`, writing it on a worker thread.
 
-    # Write the file content
-    with open(full_path, "w", encoding="utf-8") as file:
-        file.write(content)
+    Args:
+        file_path: The file path where content will be saved.
+        content: Content to save.
+    """
+    full_path = file_target(file_path)
+    if full_path is None:
+        return
+    with span("save_file", path=file_path) as current:
+        file_saved(full_path, content, await file_writer.write(full_path, content), current)
 
 def load_file(file_path: str) -> str:
     """
@@ -104,7 +278,7 @@ def load_file(file_path: str) -> str:
     return ""
 
 
-def create_metadata(tree: list) -> pd.DataFrame:
+def create_metadata(tree: list) -> "pd.DataFrame":
     """
     Create a DataFrame for project metadata.
 
@@ -114,11 +288,10 @@ def create_metadata(tree: list) -> pd.DataFrame:
     Returns:
         A DataFrame containing file paths and descriptions.
     """
-    df = pd.DataFrame(tree)
-    os.makedirs(path_project, exist_ok=True)
-    metadata_path = os.path.join(path_project, "metadata.pkl")
-    df.to_pickle(metadata_path)
-    return df
+    import pandas as pd
+
+    get_store().set_tree(tree)
+    return pd.DataFrame(tree)
 
 
 import re
@@ -134,83 +307,402 @@ def extract_markdown_code(llm_output: str) -> str:
         str: The cleaned code content containing all valid code blocks, 
              or a message indicating no code was found.
     """
-    try:
-        # Find all code blocks enclosed in triple backticks
-        code_blocks = re.findall(r"```(?:\w+\n)?(.*?)```", llm_output, re.DOTALL)  
+    with span("extract_markdown_code"):
+        try:
+            # Find all code blocks enclosed in triple backticks
+            code_blocks = re.findall(r"```(?:\w+\n)?(.*?)```", llm_output, re.DOTALL)  
         
-        # Concatenate all extracted code blocks, each separated by a newline
-        extracted_code = "\n\n".join(block.strip() for block in code_blocks if block.strip())
+            # Concatenate all extracted code blocks, each separated by a newline
+            extracted_code = "\n\n".join(block.strip() for block in code_blocks if block.strip())
         
-        # Return the extracted code or a message if no code blocks are found
-        return extracted_code if extracted_code else "No code blocks found."
-    except Exception as e:
-        return f"Error in extracting code: {e}"
+            # Return the extracted code or a message if no code blocks are found
+            return extracted_code if extracted_code else "No code blocks found."
+        except Exception as e:
+            return f"Error in extracting code: {e}"
+
+def generation_error(response: str):
+    """
+    Check whether an LLM response can be used as the content of a file.
+
+    Args:
+        response: The raw response.
+
+    Returns:
+        The reason the response is unusable (a failed request or no code block),
+        or None if it holds code.
+    """
+    if response.startswith("Error:"):
+        return response
+    if extract_markdown_code(response) == "No code blocks found.":
+        return "The response has no code block."
+    return None
+
+def file_instructions(path: str, description: str) -> str:
+    """
+    Build the part of a file's generation prompt that doesn't depend on other files.
+
+    Args:
+        path: The file path from the project tree.
+        description: The purpose of the file.
+
+    Returns:
+        The instructions text.
+    """
+    instructions = (
+        f"Now create or update the file at '{path}' based on its purpose:\n{description}\n\n"
+        f"If the file is a main application, ensure it calls all dependencies correctly."
+        "Output only the code required for this file. Do not include explanations, comments, or additional context. "
+        "Simply return the raw code content."
+    )
+
+    # Extract the file extension
+    _, extension = os.path.splitext(path)
+
+    # Modify the prompt for specific extensions
+    if extension == ".md":
+        instructions += " Please create a professional README of this project."
+    return instructions
+
+def new_file_prompt(instructions: str, dependency_code: str) -> str:
+    """
+    Build the prompt generating a new file from its instructions and dependency code.
+    """
+    return (
+        f"You are building a project. The following dependencies have been written:\n\n"
+        f"{dependency_code}\n\n"
+        f"{instructions}"
+    )
 
-async def build_project(df: pd.DataFrame):
+def batch_prompt(files: list) -> str:
     """
-    Build the project dynamically, updating dependencies and main files iteratively.
+    Build the prompt generating several small files in one request.
+
+    Args:
+        files: (path, description) tuples of the files.
+
+    Returns:
+        The prompt text.
+    """
+    listing = "\n".join(f"- '{path}': {description}" for path, description in files)
+    return (
+        f"You are building a project. Create each of the following small files based on its purpose:\n"
+        f"{listing}\n\n"
+        "Reply with one fenced code block per file, with the file path right after the opening backticks, "
+        "for example:\n```./src/__init__.py\n...\n```\n"
+        "Use an empty block for a file that should be empty. "
+        "Output only the content of the files. Do not include explanations or additional context."
+    )
+
+async def build_project(df: "pd.DataFrame", max_concurrency: int = MAX_CONCURRENCY, on_event=None,
+                        incremental: bool = True):
+    """
+    Build the project dynamically, generating independent files concurrently.
+
+    Files are scheduled over a dependency graph: leaf modules first, entry points
+    and README last. A file only waits for the files it depends on. With
+    `incremental`, files whose inputs are unchanged since the last build are
+    reused from disk, as recorded in `manifest.json`.
 
     Args:
         df: DataFrame containing the project structure.
+        max_concurrency: Maximum number of files generated at the same time.
+        on_event: Optional callback receiving (kind, path, text) progress events,
+            where kind is "start", "token", "done" or "failed".
+        incremental: Reuse files whose inputs did not change.
 
     Returns:
         Generation status.
     """
     generated_files = {}  # Store generated code for each file
-    pending_files = list(df.itertuples(index=False))
-
-    while pending_files:
-        file_info = pending_files.pop(0)
-        path, description = file_info.path, file_info.description
+    symbol_index = SymbolIndex()  # Interface stubs of the generated files
+    entries = [(file_info.path, file_info.description) for file_info in df.itertuples(index=False)]
+    graph = build_dependency_graph(entries)
+
+    # Repeated paths get their own manifest entry per occurrence
+    project_path = get_project_path()
+    manifest = BuildManifest(os.path.join(project_path, "manifest.json"))
+    manifest_keys, occurrences = [], {}
+    for path, _ in entries:
+        occurrences[path] = occurrences.get(path, 0) + 1
+        manifest_keys.append(path if occurrences[path] == 1 else f"{path}#{occurrences[path]}")
+
+    store = get_store()
+    counts = {"generated": 0, "reused": 0, "failed": 0}
+    failed_paths = []  # Files whose generation failed; they are neither saved nor recorded
+
+    # Small boilerplate files without dependencies are generated several per request
+    batches = {}  # Entry index -> indices of its batch
+    if BATCH_SMALL_FILES:
+        batchable = []
+        for index, (path, description) in enumerate(entries):
+            if path.endswith("/") or graph[index] or occurrences[path] > 1 or not is_boilerplate(path, description):
+                continue
+            if incremental:
+                full_path = os.path.join(project_path, path.lstrip("./"))
+                existing = load_file(full_path) if os.path.isfile(full_path) else None
+                inputs = input_hash(file_instructions(path, description), GENERATION_SETTINGS, {})
+                if manifest.is_fresh(manifest_keys[index], inputs, existing):
+                    continue  # Reused below without a request
+            batchable.append(index)
+        for start in range(0, len(batchable), max(1, BATCH_MAX_FILES)):
+            group = batchable[start:start + BATCH_MAX_FILES]
+            if len(group) > 1:
+                batches.update((index, group) for index in group)
+    batch_tasks = {}  # First index of a batch -> task generating it
+
+    def notify(kind, path, text=""):
+        if on_event is not None:
+            on_event(kind, path, text)
+
+    async def stream_completion(path, prompt, save_blocks=True):
+        """
+        Stream a completion for a file, reporting progress and persisting finished blocks.
+        """
+        notify("start", path)
+        stream = FencedBlockStream()
+        full_path = os.path.join(project_path, path.lstrip("./"))
+        # Blocks the file on disk already starts with aren't rewritten, so regenerating
+        # identical code leaves the file and its mtime untouched
+        had_file = save_blocks and os.path.isfile(full_path)
+        existing = load_file(full_path) if had_file else ""
+        saved, chunk = False, ""
+        async for chunk in generate_code_stream(prompt):
+            # Persist finished code blocks as soon as they are complete
+            if stream.feed(chunk) and save_blocks and not existing.startswith(stream.code):
+                await save_file_async(path, stream.code)
+                saved = True
+            notify("token", path, chunk)
+        if chunk.startswith("Error:"):
+            # The stream failed: undo the partial saves and report the error alone
+            if saved and had_file:
+                await save_file_async(path, existing)
+            elif saved:
+                os.remove(full_path)
+            return chunk
+        return stream.text
+
+    async def update_file(path, description, current, dependency_code):
+        """
+        Update an existing file through small edits instead of a full rewrite.
+
+        Iterates until the model reports no further changes, the content repeats
+        (converged or oscillating) or MAX_UPDATE_ITERATIONS is reached. A reply
+        without edit blocks is taken as the whole new file, which must pass
+        `validate_content` like any edit.
+
+        Returns:
+            The updated content, or None if a request failed.
+        """
+        seen = {content_hash(current)}
+        feedback = ""
+        for iteration in range(MAX_UPDATE_ITERATIONS):
+            prompt = (
+                f"You are updating a file in a project. The following dependencies have been written:\n\n"
+                f"{dependency_code}\n\n"
+                f"The current content of '{path}' is:\n```\n{current}\n```\n\n"
+                f"Update the file so it fulfils its purpose:\n{description}\n\n"
+                f"If the file is a main application, ensure it calls all dependencies correctly. "
+                "Do not rewrite the whole file. Reply only with the edits, as one or more blocks of the form:\n"
+                "<<<<<<< SEARCH\nexact lines from the current file\n=======\nreplacement lines\n>>>>>>> REPLACE\n"
+                f"If the file needs no changes, reply with {NO_CHANGES}."
+                f"{feedback}"
+            )
+            logger.info("Requesting edits for %s (iteration %d)", path, iteration + 1)
+            log_artifact("prompt", path, prompt, iteration=iteration + 1)
+            response = await stream_completion(path, prompt, save_blocks=False)
+            log_artifact("completion", path, response, iteration=iteration + 1)
+            if response.startswith("Error:"):
+                logger.warning("Requesting edits for %s failed: %s", path, response)
+                return None
+
+            try:
+                updated = apply_patch(current, response)
+            except PatchError as e:
+                updated, error = None, str(e)
+            else:
+                error = None
+            if updated is None and error is None:
+                if NO_CHANGES in response:
+                    break
+                # The model ignored the edit format and returned the whole file, fenced or raw
+                updated = extract_markdown_code(response) if "```" in response else response.strip()
+                if not updated:
+                    error = "The response is empty."
+
+            error = error or validate_content(path, updated)
+            if error:
+                logger.warning("Rejected edits for %s: %s", path, error)
+                feedback = f"\n\nYour previous edits could not be applied: {error}"
+                continue
+
+            digest = content_hash(updated)
+            if digest in seen:
+                break
+            seen.add(digest)
+            current = updated
+            feedback = ""
+            await save_file_async(path, current)
+        return current
+
+    async def generate_batch(group):
+        """
+        Generate the files of a batch in one request.
+
+        Returns:
+            dict: Maps the paths found in the response to their content.
+        """
+        files = [entries[index] for index in group]
+        with span("generate_batch", files=len(files)):
+            logger.info("Generating %d small files in one request: %s",
+                        len(files), ", ".join(path for path, _ in files))
+            prompt = batch_prompt(files)
+            log_artifact("prompt", "batch", prompt, files=[path for path, _ in files])
+            with response_scope() as responses:
+                response = await generate_code(prompt)
+            log_artifact("completion", "batch", response)
+        files = split_path_blocks(response, [path for path, _ in files])
+        if not files:
+            responses.reject()  # Unusable; the next build asks again
+        return files
+
+    def batch_result(group):
+        # The first file of a batch to be scheduled starts the request; the others share it
+        if group[0] not in batch_tasks:
+            batch_tasks[group[0]] = asyncio.ensure_future(generate_batch(group))
+        return batch_tasks[group[0]]
+
+    async def generate_entry(index):
+        path, description = entries[index]
 
         # Skip directories; ensure they exist
         if path.endswith("/") or os.path.basename(path) == "":
-            os.makedirs(os.path.join(path_project, path.lstrip("./")), exist_ok=True)
-            continue
+            os.makedirs(os.path.join(project_path, path.lstrip("./")), exist_ok=True)
+            return
+
+        manifest_key = manifest_keys[index]
+        previous_code = generated_files.get(path)
+
+        # A file is only as good as what it's built on: skip it, unrecorded, if a dependency
+        # failed in this run, so the next build regenerates both
+        failed_dependencies = [
+            entries[dep][0] for dep in transitive_dependencies(graph, index) if entries[dep][0] in failed_paths
+        ]
+        if failed_dependencies:
+            logger.warning("Skipping %s: its dependency %s failed", path, failed_dependencies[0])
+            failed_paths.append(path)
+            counts["failed"] += 1
+            notify("failed", path, f"Dependency {failed_dependencies[0]} failed.")
+            return
 
         # Build dependency files first
-        dependencies = [dep for dep in generated_files.keys() if dep != path]
-        dependency_code = "\n".join([f"### Dependency: {dep}\n{generated_files[dep]}" for dep in dependencies])
-
-        # Create a prompt with the dependency code (if any)
-        prompt = (
-            f"You are building a project. The following dependencies have been written:\n\n"
-            f"{dependency_code}\n\n"
-            f"Now create or update the file at '{path}' based on its purpose:\n{description}\n\n"
-            f"If the file is a main application, ensure it calls all dependencies correctly."
-            "Output only the code required for this file. Do not include explanations, comments, or additional context. "
-            "Simply return the raw code content."
-        )
-
-        # Extract the file extension
-        _, extension = os.path.splitext(path)
-
-        # Modify the prompt for specific extensions
-        if extension == ".md":
-            prompt += " Please create a professional README of this project."
-
-
-        print("Creating the prompt...")
-        print("prompt: ",prompt)
-        # Generate code for the current file
-        print("Generating the code ...")
-        generated_code = await generate_code(prompt)
-        #print("Code generated:")
-        #print(generated_code)
-        generated_code=extract_markdown_code(generated_code)
-        print("Code generated clean:")
-        print(generated_code)
-        previous_code = generated_files.get(path, "")
+        dependencies = [
+            entries[dep][0] for dep in transitive_dependencies(graph, index)
+            if entries[dep][0] != path and entries[dep][0] in generated_files
+        ]
+        dependencies = list(dict.fromkeys(dependencies))
+
+        # Everything in the prompt except the dependency code
+        instructions = file_instructions(path, description)
+
+        # Reuse the file on disk if none of its inputs changed since the last build
+        dependency_hashes = {dep: content_hash(generated_files[dep]) for dep in dependencies}
+        if previous_code is not None:
+            dependency_hashes[path] = content_hash(previous_code)
+        inputs = input_hash(instructions, GENERATION_SETTINGS, dependency_hashes)
+        if incremental:
+            full_path = os.path.join(project_path, path.lstrip("./"))
+            existing = load_file(full_path) if os.path.isfile(full_path) else None
+            if manifest.is_fresh(manifest_key, inputs, existing):
+                logger.info("Reusing %s: inputs unchanged since the last build", path)
+                generated_files[path] = existing
+                symbol_index.update(path, existing)
+                counts["reused"] += 1
+                notify("done", path, existing)
+                return
+
+        generated_code = None
+        if index in batches:
+            notify("start", path)
+            generated_code = (await batch_result(batches[index])).get(path)
+            if generated_code is None:
+                logger.warning("%s is missing from the batched response; generating it on its own", path)
+
+        if generated_code is None:
+            # Keep only the most relevant dependencies that fit the prompt budget
+            if USE_INTERFACE_STUBS:
+                candidates = {dep: symbol_index.stub(dep, generated_files[dep]) for dep in dependencies}
+            else:
+                candidates = {dep: generated_files[dep] for dep in dependencies}
+            dependency_code, context_stats = build_dependency_context(path, description, candidates)
+            logger.debug(
+                "Context for %s: %d/%d dependencies, %d tokens (%d saved)", path, context_stats["included"],
+                context_stats["available"], context_stats["tokens_used"], context_stats["tokens_saved"],
+            )
 
-        # Check if the main file needs updating
-        if path in generated_files and previous_code != generated_code:
-            # Add the main file back to the pending queue for re-generation
-            pending_files.append(file_info)
+            if previous_code is not None:
+                # The file was already generated: patch it instead of rewriting it
+                generated_code = await update_file(path, description, previous_code, dependency_code)
+                if generated_code is None:
+                    failed_paths.append(path)
+                    counts["failed"] += 1
+                    notify("failed", path, "Requesting edits failed.")
+                    return
+            else:
+                # Create a prompt with the dependency code (if any)
+                prompt = new_file_prompt(instructions, dependency_code)
+
+                logger.debug("Prompt for %s: %s", path, payload(prompt))
+                log_artifact("prompt", path, prompt)
+                # Generate code for the current file
+                with response_scope() as responses:
+                    response = await stream_completion(path, prompt)
+                log_artifact("completion", path, response)
+                error = generation_error(response)
+                if error is not None:
+                    # Nothing is saved or recorded, and the response is dropped from the
+                    # LLM cache, so the next build sends the request again
+                    responses.reject()
+                    logger.warning("Generation of %s failed: %s", path, error)
+                    failed_paths.append(path)
+                    counts["failed"] += 1
+                    notify("failed", path, error)
+                    return
+                generated_code = extract_markdown_code(response)
+                logger.debug("Generated %s: %s", path, payload(generated_code))
 
         # Save the generated code and update the in-memory dictionary
-        save_file(path, generated_code)
+        await save_file_async(path, generated_code)
         generated_files[path] = generated_code
-
+        symbol_index.update(path, generated_code)
+        manifest.record(manifest_key, inputs, generated_code)
+        manifest.save()
+        store.record_version(path, generated_code, run_id)
+        counts["generated"] += 1
+        notify("done", path, generated_code)
+
+    async def generate_entry_traced(index):
+        with span("build_file", path=entries[index][0]):
+            await generate_entry(index)
+
+    run_id = store.start_run(current_session(), files=len(entries))
+    status = "failed"
+    try:
+        with span("build_project", session=current_session(), files=len(entries)):
+            await run_dependency_graph(graph, generate_entry_traced, max_concurrency)
+            # Under the "batch" fsync policy the generated files reach the disk here, all at once
+            await file_writer.flush()
+        status = "failed" if failed_paths else "succeeded"
+    finally:
+        for task in batch_tasks.values():
+            task.cancel()
+        store.finish_run(run_id, status, **counts)
+    manifest.prune(manifest_keys)
+    manifest.save()
+    if failed_paths:
+        return (
+            f"Project build failed: {len(failed_paths)} of {len(entries)} files could not be generated "
+            f"({', '.join(failed_paths)}). Run Step 2 again to retry them."
+        )
     return "Project built successfully!"
 # --- Gradio Interface Functions ---
 
@@ -218,44 +710,60 @@ import json
 import re
 import os
 
-def clean_and_extract_json(llm_output):
+def parse_project_tree(llm_output: str) -> list:
     """
-    Cleans the LLM output to extract a valid JSON structure and adjusts paths.
+    Parse and check a project tree returned by the LLM.
+
+    Accepts a `{"files": [...]}` object as requested by PROJECT_TREE_FORMAT or a
+    bare list, with or without a Markdown fence around it.
 
     Args:
         llm_output (str): The raw output generated by the LLM.
 
     Returns:
-        list: Parsed JSON object if successful, otherwise a default error structure.
+        list: Dictionaries with 'path' and 'description'.
+
+    Raises:
+        ValueError: If the output isn't a valid project tree.
     """
-    try:
-        if not llm_output.strip():
-            raise ValueError("Empty output from LLM.")
+    value = extract_json(llm_output)
+    if isinstance(value, dict):
+        value = value.get("files")
+    if not isinstance(value, list) or not value:
+        raise ValueError('Expected a non-empty "files" list.')
+    for index, item in enumerate(value):
+        if not isinstance(item, dict) or not all(isinstance(item.get(key), str) for key in ("path", "description")):
+            raise ValueError(f'files[{index}] must be an object with string "path" and "description" fields.')
+    return [{"path": item["path"], "description": item["description"]} for item in value]
+
+
+def tree_path(path: str) -> str:
+    """
+    Place a path of the LLM's project tree inside the "./generated/" folder.
+    """
+    return os.path.join("./generated", path.lstrip("./"))
 
-        # Extract JSON content from between code blocks or explanatory text
-        json_match = re.search(r"```json\s*(\[\s*{.*?}\s*]\s*)```", llm_output, re.DOTALL)
-        if not json_match:
-            raise ValueError("No valid JSON block found.")
 
-        # Clean the extracted JSON block
-        cleaned_output = json_match.group(1).strip()
+def clean_and_extract_json(llm_output):
+    """
+    Cleans the LLM output to extract a valid JSON structure and adjusts paths.
 
-        # Attempt to parse as JSON
-        extracted_json = json.loads(cleaned_output)
+    Args:
+        llm_output (str): The raw output generated by the LLM.
 
-        # Ensure the extracted JSON is a list of dictionaries with 'path' and 'description' keys
-        if not isinstance(extracted_json, list) or not all(
-            isinstance(item, dict) and "path" in item and "description" in item for item in extracted_json
-        ):
-            raise ValueError("Invalid project tree format.")
+    Returns:
+        list: Parsed JSON object if successful, otherwise a default error structure.
+    """
+    try:
+        extracted_json = parse_project_tree(llm_output)
 
         # Prepend "./generated/" to all paths
         for item in extracted_json:
-            item['path'] = os.path.join("./generated", item['path'].lstrip("./"))
+            item['path'] = tree_path(item['path'])
         
         return extracted_json
 
-    except (json.JSONDecodeError, ValueError) as e:
+    except ValueError as e:
         # Handle JSON decoding or validation errors
         return [{'path': './generated/error.txt', 'description': f'Error: {str(e)}'}]
 
@@ -268,7 +776,14 @@ def clean_generated_folder():
         Status message.
     """
     try:
-        shutil.rmtree(path_project)
+        index = get_explorer_index(create=False)
+        if index is not None:
+            index.stop()
+            explorer_indexes.pop(index.base_path, None)
+        store = project_stores.pop(get_project_path(), None)
+        if store is not None:
+            store.close()
+        shutil.rmtree(get_project_path())
         return "Generated folder cleaned successfully."
     except Exception as e:
         return f"Error in cleaning the generated folder: {str(e)}"
@@ -296,53 +811,252 @@ def format_project_tree(tree):
 
 
 
-async def step_1(instruction: str, framework: str):
+def is_speculation_candidate(path: str, description: str, seen_paths: list) -> bool:
+    """
+    Check whether a tree entry looks like a leaf file that can be generated before
+    the tree is complete: a non-entry-point file mentioning no other file seen so far.
+    """
+    if path.endswith("/") or file_tier(path) != 0:
+        return False
+    return not any(
+        pattern.search(description) for other in seen_paths if other != path for pattern in mention_patterns(other)
+    )
+
+async def speculate_file(path: str, description: str):
+    """
+    Generate a leaf file with the exact prompt Step 2 would use for it.
+
+    Returns:
+        tuple: The instructions and the generated code, or None on failure.
+    """
+    with span("speculate_file", path=path):
+        instructions = file_instructions(path, description)
+        dependency_code, _ = build_dependency_context(path, description, {})
+        with response_scope() as responses:
+            chunks = [chunk async for chunk in generate_code_stream(new_file_prompt(instructions, dependency_code))]
+        response = "".join(chunks)
+        # A stream failing midway ends with its error
+        if (chunks and chunks[-1].startswith("Error:")) or generation_error(response) is not None:
+            # Step 2 sends the same prompt; it must not get this response from the cache
+            responses.reject()
+            return None
+        return instructions, extract_markdown_code(response)
+
+async def settle_speculation(tree: list, speculative: dict) -> tuple:
+    """
+    Keep the speculatively generated files that the final tree confirms and
+    discard the others.
+
+    A file is kept if its entry is unchanged, appears once and has no dependencies
+    in the final dependency graph. Kept files are saved and recorded in the build
+    manifest, so Step 2 reuses them instead of generating them again.
+
+    Args:
+        tree: The final project tree.
+        speculative: Maps (path, description) to the task generating the file.
+
+    Returns:
+        tuple: The number of kept and discarded files.
+    """
+    entries = [(item["path"], item["description"]) for item in tree]
+    graph = build_dependency_graph(entries)
+    occurrences = {}
+    for path, _ in entries:
+        occurrences[path] = occurrences.get(path, 0) + 1
+
+    kept, discarded = {}, 0
+    for entry, task in speculative.items():
+        index = entries.index(entry) if entry in entries else None
+        if index is None or occurrences[entry[0]] > 1 or graph[index]:
+            task.cancel()
+            discarded += 1
+        else:
+            kept[entry] = task
+
+    manifest = BuildManifest(os.path.join(get_project_path(), "manifest.json"))
+    store = get_store()
+    for (path, _), task in kept.items():
+        try:
+            result = await task
+        except Exception as e:
+            logger.warning("Speculative generation of %s failed: %s", path, e)
+            result = None
+        if result is None:
+            continue
+        instructions, generated_code = result
+        await save_file_async(path, generated_code)
+        # Same inputs as a leaf file in Step 2: no dependencies, no previous version
+        manifest.record(path, input_hash(instructions, GENERATION_SETTINGS, {}), generated_code)
+        store.record_version(path, generated_code)
+    manifest.save()
+    return len(kept), discarded
+
+async def step_1(instruction: str, framework: str, express: bool = EXPRESS_MODE):
     """
     Step 1: Generate the project tree using the instruction and framework.
 
     Args:
         instruction: High-level project requirement.
         framework: Selected framework.
+        express: Generate leaf files while the tree is still streaming.
 
     Returns:
         Project tree as a Python list of dictionaries.
     """
-    tree_prompt = (
-        f"Based on the following instruction and selected framework, generate a project structure as a JSON list of dictionaries.\n"
-        f"Instruction: {instruction}\n"
-        f"Framework: {framework}\n\n"
-        f"Format each entry with 'path' (file path) and 'description' (purpose of the file).\n"
-        f"Example: [{{'path': './src/main.py', 'description': 'Main application entry point.'}}, "
-        f"{{'path': './src/utils/logging.py', 'description': 'Logging utilities.'}}]"
-    )
-    print("First prompt:", tree_prompt)
-
-    # Generate project tree
-    tree = await generate_code(tree_prompt)
-    print("AI :", tree)
-    # Clean and extract JSON
-    tree = clean_and_extract_json(tree)
-    print("Cleaned:", tree)
-
-    # Validate and handle errors
-    if isinstance(tree, list) and all("path" in item and "description" in item for item in tree):
-        # If tree is valid, save metadata
-        df = create_metadata(tree)
-        return f"Project Tree:\n{tree}"
-    else:
-        # Handle invalid format
-        return [{"path": "./generated/error.txt", "description": "Invalid project tree format or JSON parsing error."}]
+    with span("step_1", session=current_session()) as current:
+        tree_prompt = (
+            f"Based on the following instruction and selected framework, generate a project structure as JSON.\n"
+            f"Instruction: {instruction}\n"
+            f"Framework: {framework}\n\n"
+            f"Return an object with a 'files' list. Format each entry with 'path' (file path) and "
+            f"'description' (purpose of the file).\n"
+            f'Example: {{"files": [{{"path": "./src/main.py", "description": "Main application entry point."}}, '
+            f'{{"path": "./src/utils/logging.py", "description": "Logging utilities."}}]}}'
+        )
+        logger.debug("Tree prompt: %s", payload(tree_prompt))
+        log_artifact("prompt", "project_tree", tree_prompt)
+
+        # In express mode, leaf files are generated as soon as their tree entry is complete
+        speculative = {}  # (path, description) -> generation task
+        slots = asyncio.Semaphore(MAX_CONCURRENCY)
+
+        async def speculate(path, description):
+            async with slots:
+                return await speculate_file(path, description)
+
+        # Generate the project tree in structured output mode, reporting entries as they stream in
+        # Responses behind a tree that stays invalid are dropped from the LLM cache
+        with response_scope() as responses:
+            items = JsonItemStream()
+            chunks = []
+            try:
+                async for chunk in generate_code_stream(tree_prompt, response_format=PROJECT_TREE_FORMAT):
+                    chunks.append(chunk)
+                    for item in items.feed(chunk):
+                        logger.debug("Tree entry: %s", item["path"])
+                        entry = (tree_path(item["path"]), item["description"])
+                        seen_paths = [tree_path(seen["path"]) for seen in items.items]
+                        if express and entry not in speculative and is_speculation_candidate(*entry, seen_paths):
+                            speculative[entry] = asyncio.create_task(speculate(*entry))
+            except BaseException:
+                for task in speculative.values():
+                    task.cancel()
+                raise
+            tree = "".join(chunks)
+            log_artifact("completion", "project_tree", tree)
+
+            try:
+                parse_project_tree(tree)
+                error = None
+            except ValueError as e:
+                error = e
+            if error is not None and not tree.startswith("Error:"):
+                # Ask once for a corrected version of this output instead of regenerating the tree
+                logger.warning("Repairing the project tree: %s", error)
+                current.add("repairs")
+                repair_prompt = (
+                    f"The following output should be JSON matching this schema:\n"
+                    f"{json.dumps(PROJECT_TREE_SCHEMA)}\n\n"
+                    f"It is invalid: {error}\n\n"
+                    f"Output:\n{tree}\n\n"
+                    f"Return only the corrected JSON, keeping every entry."
+                )
+                tree = await generate_code(repair_prompt, response_format=PROJECT_TREE_FORMAT)
+                log_artifact("completion", "project_tree", tree, repair=True)
+                try:
+                    parse_project_tree(tree)
+                    error = None
+                except ValueError as e:
+                    error = e
+
+        # Validate and handle errors
+        if error is None:
+            # Clean and extract JSON; if the tree is valid, save metadata
+            tree = clean_and_extract_json(tree)
+            logger.info("Project tree with %d entries", len(tree))
+            df = create_metadata(tree)
+            current.set(files=len(tree))
+            if speculative:
+                kept, discarded = await settle_speculation(tree, speculative)
+                logger.info("Express mode: %d files generated early, %d discarded", kept, discarded)
+                current.set(speculated=kept, discarded=discarded)
+            return f"Project Tree:\n{tree}"
+        else:
+            # Handle invalid format
+            responses.reject()
+            for task in speculative.values():
+                task.cancel()
+            return [{"path": "./generated/error.txt", "description": f"Invalid project tree format or JSON parsing error: {error}"}]
+
+def format_build_progress(progress: dict) -> str:
+    """
+    Render the per-file progress of Step 2 for display in Gradio.
+
+    Args:
+        progress: Maps each file path to its state and streamed character count.
+
+    Returns:
+        A readable progress summary.
+    """
+    done = sum(1 for state, _ in progress.values() if state == "done")
+    failed = sum(1 for state, _ in progress.values() if state == "failed")
+    lines = [f"Files generated: {done}/{len(progress)}" + (f", {failed} failed" if failed else "")]
+    for path, (state, size) in progress.items():
+        lines.append(f"- {path}: {state} ({size} chars)")
+    return "\n".join(lines)
 
 async def step_2():
     """
     Step 2: Generate the project files dynamically with dependency updates.
 
-    Returns:
-        Generation status.
+    Yields:
+        The generation progress and the live code of the file being generated.
     """
-    metadata_path = os.path.join(path_project, "metadata.pkl")
-    df = pd.read_pickle(metadata_path)
-    return await build_project(df)
+    import pandas as pd
+
+    tree = get_store().load_tree()
+    if not tree:
+        raise ValueError("No project tree found. Run Step 1 first.")
+    df = pd.DataFrame(tree)
+
+    events = asyncio.Queue()
+    build = asyncio.create_task(build_project(df, on_event=lambda *event: events.put_nowait(event)))
+    progress = {}  # Path -> (state, streamed characters)
+    streamed = {}  # Path -> raw streamed text
+    live_path = None
+
+    try:
+        while not build.done() or not events.empty():
+            try:
+                event = await asyncio.wait_for(events.get(), timeout=0.1)
+            except asyncio.TimeoutError:
+                continue
+            # Drain everything that arrived meanwhile, then refresh the UI once
+            while True:
+                kind, path, text = event
+                if kind == "start":
+                    streamed[path] = ""
+                elif kind == "token":
+                    streamed[path] = streamed.get(path, "") + text
+                state = kind if kind in ("done", "failed") else "generating"
+                progress[path] = (state, len(streamed.get(path, "")))
+                live_path = path
+                if events.empty():
+                    break
+                event = events.get_nowait()
+            yield format_build_progress(progress), streamed.get(live_path, "")
+    finally:
+        # Closing or cancelling the stream (e.g. the client went away) stops the build,
+        # so it can't keep writing to the workspace after its job slot is released
+        if not build.done():
+            build.cancel()
+            try:
+                await build
+            except asyncio.CancelledError:
+                pass
+
+    status = await build
+    yield f"{status}\n\n{format_build_progress(progress)}", streamed.get(live_path, "")
 
 def step_3():
     """
@@ -351,25 +1065,24 @@ def step_3():
     Returns:
         Validation results.
     """
-    # Define paths for metadata and validated metadata in the 'generated' folder
-    metadata_path = os.path.join(path_project, "metadata.pkl")
-    validated_metadata_path = os.path.join(path_project, "validated_metadata.pkl")
-
-    # Load the metadata DataFrame
-    df = pd.read_pickle(metadata_path)
-
-    # Validate each file's existence and size in the 'generated' folder
-    df["validation"] = df["path"].apply(lambda x: os.path.exists(os.path.join(path_project, x.lstrip("./"))) 
-                                        and os.path.getsize(os.path.join(path_project, x.lstrip("./"))) > 0)
-    
-    # Save the updated DataFrame with validation results
-    df.to_pickle(validated_metadata_path)
-
-
-
+    import pandas as pd
+
+    with span("step_3", session=current_session()) as current:
+        store = get_store()
+        tree = store.load_tree()
+
+        # Run the static checks, reusing the results of files that didn't change
+        results = validate_files(get_project_path(), [item["path"] for item in tree], store.validations())
+        store.set_validations([result for result in results if not result["cached"]])
+        current.set(
+            files=len(results),
+            invalid=sum(1 for result in results if not result["valid"]),
+            cached=sum(1 for result in results if result["cached"]),
+        )
 
-    # Return the validation results as a subset of the DataFrame
-    return df[["path", "validation"]]
+        # Return the validation results
+        df = pd.DataFrame(results, columns=["path", "valid", "message"])
+        return df.rename(columns={"valid": "validation"})
 
 def step_4():
     """
@@ -378,94 +1091,204 @@ def step_4():
     Returns:
         A tuple containing the status message and the path to the zip file for download.
     """
-    # Create Dockerfile content
-    dockerfile_content = """
+    with span("step_4", session=current_session()) as current:
+        # Create Dockerfile content
+        dockerfile_content = """
     FROM python:3.9-slim
     WORKDIR /app
     COPY . .
     RUN pip install -r requirements.txt
     CMD ["python", "./src/main.py"]
     """
-    save_file("./Dockerfile", dockerfile_content.strip())
-    
-    # Path for the zip file
-    zip_file_path = os.path.join(current_directory, f"{project_name}.zip")
+        save_file("./Dockerfile", dockerfile_content.strip())
     
-    try:
-        # Create a zip file of the project
-        shutil.make_archive(base_name=path_project, format='zip', root_dir=path_project)
-        return f"Dockerfile created and project saved as a zip file.", zip_file_path
-    except Exception as e:
-        # If zipping fails, return an error message and None for the file path
-        return f"Error in zipping the project: {str(e)}", None
+        # Archive next to the project folder, reusing unchanged compressed entries
+        project_path = get_project_path()
+
+        try:
+            archive_path, stats = write_archive(project_path, project_path, cache=archive_cache)
+            current.set(bytes_written=stats["bytes"], entries=stats["entries"], reused=stats.get("reused", 0))
+            return f"Dockerfile created and project saved as {os.path.basename(archive_path)}.", archive_path
+        except Exception as e:
+            # If zipping fails, return an error message and None for the file path
+            return f"Error in zipping the project: {str(e)}", None
 
 
 
 
-import pandas as pd
-from utils.display_and_store_directory_content import display_and_store_directory_content
+from utils.directory_index import DirectoryIndex
 
-def load_generated_data(base_path, output_pickle):
+def get_explorer_index(create: bool = True):
     """
-    Extract all content and paths from the given directory,
-    save them in a pickle file, and load them for Gradio display.
+    Return the explorer index of the current project, creating it on first use.
+
+    Tree paths are prefixed with "./generated", so files live in a nested folder.
+    """
+    base_path = os.path.abspath(os.path.join(get_project_path(), "generated"))
+    index = explorer_indexes.get(base_path)
+    if index is None and create:
+        # Drop the indexes of workspaces removed by the job manager
+        for stale in [index for index in explorer_indexes.values() if not os.path.isdir(index.base_path)]:
+            stale.stop()
+            explorer_indexes.pop(stale.base_path, None)
+        index = explorer_indexes.setdefault(base_path, DirectoryIndex(base_path))
+        index.watch()
+    return index
+
+
+def load_generated_data(index: DirectoryIndex):
+    """
+    Refresh the directory index for Gradio display. Only files added or changed
+    since the previous refresh are read; file content is read when a file is selected.
 
     Args:
-        base_path (str): Directory to scan.
-        output_pickle (str): Path to save the pickle file.
+        index (DirectoryIndex): The index of the directory to show.
 
     Returns:
-        pd.DataFrame: DataFrame containing the paths and content.
+        pd.DataFrame: DataFrame with 'path', 'size', 'mtime' and 'type' columns,
+                      paths relative to the indexed directory.
     """
-    # Run the display_and_store_directory_content utility
-    display_and_store_directory_content(base_path)
-
-    # Load the generated pickle file into a DataFrame
-    try:
-        df = pd.read_pickle(output_pickle)
-        if df.empty:
-            raise ValueError("The DataFrame is empty. Check the directory contents.")
-        if not {"path", "content"}.issubset(df.columns):
-            raise ValueError(f"Pickle file does not contain the required columns: {df.columns}")
-        return df
-    except Exception as e:
-        raise ValueError(f"Error loading pickle file: {e}")
-
+    import pandas as pd
+
+    changes = index.refresh()
+    logger.debug("Explorer refresh: %d added, %d modified, %d removed",
+                 len(changes["added"]), len(changes["modified"]), len(changes["removed"]))
+    df = pd.DataFrame(index.snapshot(), columns=["path", "size", "mtime", "type"])
+    if df.empty:
+        raise ValueError("The directory is empty. Check the directory contents.")
+    # Server paths stay on the server; `display_file_content` maps them back
+    df["path"] = [os.path.relpath(path, index.base_path) for path in df["path"]]
+    return df
 
-# Load data from the generated directory
-BASE_PATH = "./generated/generated"
-OUTPUT_PICKLE = "./extraction/generated.pkl"
 
 def update_explorer():
     """
     Load the generated data and prepare file choices for the dropdown.
     """
-    df = load_generated_data(BASE_PATH, OUTPUT_PICKLE)
+    df = load_generated_data(get_explorer_index())
     file_choices = df["path"].tolist()  # Extract file paths for the dropdown
     return df, file_choices
 
 
-def display_file_content(file_path,df_generated):
+def display_file_content(file_path, df_generated):
     """
-    Retrieve the content of the selected file from the pickle DataFrame.
+    Read the content of the selected file for display.
 
     Args:
-        file_path (str): Path of the selected file.
+        file_path (str): Path of the selected file, relative to the project's "generated" folder.
+        df_generated (pd.DataFrame): The directory index from `update_explorer`.
 
     Returns:
         str: Content of the file or an error message if unavailable.
     """
     try:
-        # Retrieve content for the selected file
         if df_generated is None:
-            raise ValueError("Data not loaded. Check the pickle file.")
-        content = df_generated.loc[df_generated["path"] == file_path, "content"].values[0]
-        return content
+            raise ValueError("Data not loaded. Click 'Explore Project Files' first.")
+        # Only files of the index can be opened; previews are cached until the file changes
+        index = get_explorer_index()
+        try:
+            return index.preview(os.path.normpath(os.path.join(index.base_path, file_path)))
+        except ValueError:
+            raise ValueError(f"{file_path} is not part of the project.") from None
     except Exception as e:
         return f"Error loading file content: {e}"
 
+def llm_latency_metrics() -> list:
+    """
+    Export the rolling LLM backend latencies as Prometheus summary lines.
+    """
+    lines = ["# TYPE factory_llm_first_token_seconds summary"]
+    for backend, stats in llm_router.latency_summary().items():
+        for quantile in ("p50", "p95", "p99"):
+            if stats[quantile] is not None:
+                lines.append(
+                    f'factory_llm_first_token_seconds{{backend="{backend}",quantile="0.{quantile[1:]}"}} '
+                    f"{stats[quantile]:.6f}"
+                )
+        lines.append(f'factory_llm_requests_total{{backend="{backend}"}} {stats["requests"]}')
+        lines.append(f'factory_llm_errors_total{{backend="{backend}"}} {stats["errors"]}')
+    return lines
+
+registry.add_collector(llm_latency_metrics)
+registry.add_collector(limiter_metrics)
+
+def performance_report():
+    """
+    Summarize the recorded spans of the current session for the Performance tab.
+
+    Returns:
+        A tuple with a Markdown waterfall of the last build and a DataFrame of recent spans.
+    """
+    import pandas as pd
+
+    spans = registry.recent_spans(current_session())
+    if not spans:
+        return "No timings recorded yet.", pd.DataFrame()
+
+    origin = spans[0].start
+    rows = []
+    for recorded in sorted(spans[-500:], key=lambda item: item.start):
+        attributes = recorded.attributes
+        rows.append({
+            "span": recorded.name,
+            "path": attributes.get("path", ""),
+            "start_s": round(recorded.start - origin, 3),
+            "duration_ms": round(recorded.duration * 1000, 1),
+            "prompt_tokens": attributes.get("prompt_tokens", 0),
+            "completion_tokens": attributes.get("completion_tokens", 0),
+            "cache_hits": attributes.get("cache_hits", 0),
+            "retries": attributes.get("retries", 0),
+            "bytes_written": attributes.get("bytes_written", 0),
+        })
+
+    # Waterfall of the files of the most recent build
+    builds = [recorded for recorded in spans if recorded.name == "build_project"]
+    files = [recorded for recorded in spans if recorded.name == "build_file"]
+    if builds:
+        files = [recorded for recorded in files if builds[-1].start <= recorded.start <= builds[-1].end]
+    if not files:
+        return "No build recorded yet.", pd.DataFrame(rows)
+    start = min(recorded.start for recorded in files)
+    total = max(recorded.end for recorded in files) - start or 1.0
+    width = 50
+    lines = [f"### Last build: {len(files)} files in {total:.2f}s", ""]
+    for recorded in sorted(files, key=lambda item: item.start):
+        offset = int((recorded.start - start) / total * width)
+        length = max(1, int(recorded.duration / total * width))
+        lines.append(f"`{'·' * offset}{'█' * length}{'·' * max(0, width - offset - length)}` "
+                     f"{recorded.duration:.2f}s {recorded.attributes.get('path', '')}  ")
+    return "\n".join(lines), pd.DataFrame(rows)
+
 # --- Gradio Interface ---
 def app():
+    import gradio as gr
+
+    # Each handler runs in the workspace of the calling Gradio session
+    async def run_step_1(instruction, framework, express, request: gr.Request):
+        return await job_manager.run(request.session_hash, step_1, instruction, framework, express)
+
+    async def run_step_2(request: gr.Request):
+        async for update in job_manager.stream(request.session_hash, step_2):
+            yield update
+
+    async def run_step_3(request: gr.Request):
+        return await job_manager.run(request.session_hash, step_3)
+
+    def run_update_explorer(request: gr.Request):
+        return job_manager.call(request.session_hash, update_explorer)
+
+    def run_display_file_content(file_path, df, request: gr.Request):
+        return job_manager.call(request.session_hash, display_file_content, file_path, df)
+
+    async def run_step_4(request: gr.Request):
+        return await job_manager.run(request.session_hash, step_4)
+
+    def run_clean_generated_folder(request: gr.Request):
+        return job_manager.call(request.session_hash, clean_generated_folder)
+
+    def run_performance_report(request: gr.Request):
+        return job_manager.call(request.session_hash, performance_report)
+
     with gr.Blocks() as interface:
         gr.Markdown("# Project Generation with Generative AI")
 
@@ -479,10 +1302,14 @@ def app():
                 placeholder="Describe the project (e.g., 'Generate a project that says hello world and logs messages').",
                 lines=2,
             )
+            express_checkbox = gr.Checkbox(
+                label="Express mode: start generating files while the tree is streaming",
+                value=EXPRESS_MODE,
+            )
             tree_output = gr.Textbox(label="Generated Project Tree")
             generate_tree_button = gr.Button("Generate Project Tree")
             generate_tree_button.click(
-                step_1, inputs=[instruction_input, framework_dropdown], outputs=tree_output
+                run_step_1, inputs=[instruction_input, framework_dropdown, express_checkbox], outputs=tree_output
             )
 
 
@@ -490,14 +1317,15 @@ def app():
 
         with gr.Tab("Step 2: Generate Files"):
             generate_files_button = gr.Button("Generate Project Files")
-            files_output = gr.Textbox(label="File Generation Status")
-            generate_files_button.click(step_2, outputs=files_output)
+            files_output = gr.Textbox(label="File Generation Status", lines=10)
+            live_code_output = gr.Textbox(label="Live Code", lines=20, interactive=False)
+            generate_files_button.click(run_step_2, outputs=[files_output, live_code_output])
 
         with gr.Tab("Step 3: Validate and Display Files"):
             # Button to validate files
             validate_button = gr.Button("Validate Project Files")
             validation_output = gr.DataFrame(label="Validation Results")
-            validate_button.click(step_3, outputs=validation_output)
+            validate_button.click(run_step_3, outputs=validation_output)
 
 
             explorer_button = gr.Button("Explore Project Files")
@@ -514,7 +1342,7 @@ def app():
 
             # Update file choices dynamically
             explorer_button.click(
-                update_explorer,
+                run_update_explorer,
                 outputs=[explorer_output, file_choices_output]
             )
 
@@ -531,15 +1359,8 @@ def app():
             )
 
             # Display file content dynamically when a file is selected
-            def display_file_content_safe(file_path, df):
-                try:
-                    content = df.loc[df["path"] == file_path, "content"].values[0]
-                    return content
-                except Exception as e:
-                    return f"Error loading file content: {e}"
-
             file_selector.change(
-                display_file_content_safe,
+                run_display_file_content,
                 inputs=[file_selector, explorer_output],
                 outputs=file_content
             )
@@ -553,8 +1374,8 @@ def app():
             download_link = gr.File(label="Download Project Zip")
 
             # Wrapper function to ensure proper output handling
-            def handle_step_4():
-                status, zip_path = step_4()
+            async def handle_step_4(request: gr.Request):
+                status, zip_path = await run_step_4(request)
                 if zip_path and os.path.exists(zip_path):
                     return status, zip_path
                 else:
@@ -568,9 +1389,20 @@ def app():
 
             clean_button = gr.Button("Clean Generated Folder")
             clean_output = gr.Textbox(label="Clean Status")
-            clean_button.click(clean_generated_folder, outputs=clean_output)
+            clean_button.click(run_clean_generated_folder, outputs=clean_output)
+
+        with gr.Tab("Performance"):
+            refresh_performance_button = gr.Button("Refresh Timings")
+            waterfall_output = gr.Markdown()
+            spans_output = gr.DataFrame(label="Recent Spans")
+            refresh_performance_button.click(run_performance_report, outputs=[waterfall_output, spans_output])
 
 
+    # Sessions are isolated and throttled by the job manager, so let Gradio run them in parallel
+    interface.queue(default_concurrency_limit=None)
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+        logger.info("Prometheus metrics available at http://%s:%d/metrics", METRICS_HOST, METRICS_PORT)
     interface.launch()
 
 # Run the app
@@ -585,7 +1417,12 @@ if __name__ == "__main__":
         print("Step 1 Output:", step_1_out)
 
         # Testing Step 2
-        step_2_out = asyncio.run(step_2())
+        async def run_step_2():
+            status = None
+            async for status, _ in step_2():
+                pass
+            return status
+        step_2_out = asyncio.run(run_step_2())
         print("Step 2 Output:", step_2_out)
 
         # Testing Step 3
@@ -0,0 +1,152 @@
+"""
+End-to-end benchmark of the Step 1 -> Step 4 pipeline against a local fake LLM server.
+
+Usage:
+    python benchmarks/bench_pipeline.py --sizes 5 50 500 --output bench_results.json
+    python benchmarks/bench_pipeline.py --sizes 5 50 --compare bench_results.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_llm_server import FakeLLMServer
+
+
+def peak_rss_mb():
+    """
+    Return the peak resident set size of this process in MiB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def run_pipeline(app, session_id):
+    """
+    Run the four pipeline steps in an isolated workspace and time each of them.
+
+    Returns:
+        dict: Seconds spent per step.
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    await app.job_manager.run(session_id, app.step_1, "Generate a modular command line tool", "Flask")
+    timings["step_1"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    async for _ in app.job_manager.stream(session_id, app.step_2):
+        pass
+    timings["step_2"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await app.job_manager.run(session_id, app.step_3)
+    timings["step_3"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await app.job_manager.run(session_id, app.step_4)
+    timings["step_4"] = time.perf_counter() - start
+    return timings
+
+
+def benchmark(sizes, latency, tokens_per_second, repeat):
+    """
+    Benchmark the pipeline for each tree size.
+
+    Returns:
+        dict: The results, ready to be saved as JSON.
+    """
+    server = FakeLLMServer(latency=latency, tokens_per_second=tokens_per_second).start()
+    workdir = tempfile.mkdtemp(prefix="factory-bench-")
+    os.environ.update({
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": server.base_url,
+        "LLM_BACKEND": "openai",
+        "LLM_CACHE_MODE": "off",
+        "WORKSPACES_DIR": os.path.join(workdir, "workspaces"),
+    })
+    os.chdir(workdir)
+
+    import_start = time.perf_counter()
+    import app
+    import_time = time.perf_counter() - import_start
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "settings": {"latency": latency, "tokens_per_second": tokens_per_second, "repeat": repeat,
+                     "max_concurrency": app.MAX_CONCURRENCY},
+        "import_seconds": import_time,
+        "runs": {},
+    }
+    try:
+        for size in sizes:
+            server.num_files = size
+            samples = []
+            for attempt in range(repeat):
+                server.reset_stats()
+                start = time.perf_counter()
+                timings = asyncio.run(run_pipeline(app, f"bench-{size}-{attempt}"))
+                wall = time.perf_counter() - start
+                samples.append({"wall_seconds": wall, "steps": timings, **server.stats})
+            best = min(samples, key=lambda sample: sample["wall_seconds"])
+            results["runs"][str(size)] = {**best, "peak_rss_mb": peak_rss_mb(), "samples": samples}
+            print(f"{size:>5} files: {best['wall_seconds']:.2f}s wall, {best['calls']} LLM calls, "
+                  f"{best['prompt_tokens']} prompt / {best['completion_tokens']} completion tokens, "
+                  f"peak RSS {peak_rss_mb():.0f} MiB")
+    finally:
+        server.stop()
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline_path):
+    """
+    Print the relative change of each metric against a previous results file.
+    """
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = json.load(file)
+    metrics = ["wall_seconds", "calls", "prompt_tokens", "completion_tokens", "peak_rss_mb"]
+    for size, run in results["runs"].items():
+        previous = baseline.get("runs", {}).get(size)
+        if previous is None:
+            continue
+        changes = []
+        for metric in metrics:
+            old, new = previous.get(metric), run.get(metric)
+            if old:
+                changes.append(f"{metric} {100 * (new - old) / old:+.1f}%")
+        print(f"{size:>5} files vs baseline: " + ", ".join(changes))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the project generation pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500], help="Project tree sizes.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake server time to first token.")
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0, help="Fake server streaming rate.")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per size; the fastest is reported.")
+    parser.add_argument("--output", default="bench_results.json", help="Where to save the JSON results.")
+    parser.add_argument("--compare", help="Previous results file to compare against.")
+    args = parser.parse_args()
+    # The benchmark changes directory, so resolve paths first
+    args.output = os.path.abspath(args.output)
+    args.compare = os.path.abspath(args.compare) if args.compare else None
+
+    results = benchmark(args.sizes, args.latency, args.tokens_per_second, args.repeat)
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results saved to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,196 @@
+import re
+import sys
+import json
+import math
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def estimate_tokens(text):
+    """
+    Estimate the token count of a text (about four characters per token).
+    """
+    return math.ceil(len(text) / 4) if text else 0
+
+
+def canned_tree(num_files):
+    """
+    Build a project tree with `num_files` entries: leaf modules with a package
+    `__init__.py` per ten modules, an entry point, a requirements file and a README.
+
+    Args:
+        num_files (int): Total number of entries.
+
+    Returns:
+        list: Dictionaries with 'path' and 'description'.
+    """
+    modules = max(1, num_files - 3)
+    tree, index = [], 0
+    while len(tree) < modules:
+        package = f"pkg_{index // 10}"
+        if index % 10 == 0 and len(tree) < modules - 1:
+            tree.append({"path": f"./src/{package}/__init__.py", "description": f"Marks {package} as a package."})
+        tree.append({
+            "path": f"./src/{package}/module_{index}.py",
+            "description": f"Module {index} of {package}: helpers for feature {index}.",
+        })
+        index += 1
+    tree.append({"path": "./src/main.py", "description": "Main application entry point using every module."})
+    tree.append({"path": "./requirements.txt", "description": "Python dependencies."})
+    tree.append({"path": "./README.md", "description": "Project documentation."})
+    return tree[:num_files]
+
+
+def canned_code(prompt, lines):
+    """
+    Build a fenced Python file answering a generation prompt, or one block tagged
+    with its path per file for a multi-file prompt.
+    """
+    listed = re.findall(r"^- '([^']+)':", prompt, re.MULTILINE)
+    if listed:
+        return "\n\n".join(f"```{path}\n# {path}\n```" for path in listed)
+    match = re.search(r"file at '([^']+)'", prompt)
+    name = re.sub(r"\W", "_", match.group(1) if match else "file")
+    body = "\n".join(f"    value_{line} = {line} * 2" for line in range(lines))
+    return f"```python\ndef run_{name}():\n    \"\"\"Generated function.\"\"\"\n{body}\n    return value_0\n```"
+
+
+class FakeLLMServer:
+    """
+    A local stand-in for the OpenAI chat completions API.
+
+    Tree prompts (Step 1) get a canned project tree of `num_files` entries, every other
+    prompt gets a canned code file. Responses start after `latency` seconds and are
+    streamed at `tokens_per_second`.
+    """
+
+    def __init__(self, num_files=5, latency=0.2, tokens_per_second=500.0, code_lines=20,
+                 host="127.0.0.1", port=0):
+        self.num_files = num_files
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.code_lines = code_lines
+        self.lock = threading.Lock()
+        self.reset_stats()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+
+    def respond(self, messages, response_format=None):
+        prompt = "\n".join(message.get("content") or "" for message in messages)
+        if "project structure" in prompt and response_format:
+            # Structured output mode returns the bare JSON object of the schema
+            content = json.dumps({"files": canned_tree(self.num_files)}, indent=2)
+        elif "project structure" in prompt:
+            content = f"```json\n{json.dumps(canned_tree(self.num_files), indent=2)}\n```"
+        else:
+            content = canned_code(prompt, self.code_lines)
+        with self.lock:
+            self.stats["calls"] += 1
+            self.stats["prompt_tokens"] += estimate_tokens(prompt)
+            self.stats["completion_tokens"] += estimate_tokens(content)
+        return content
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _write_chunk(self, data):
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path.rstrip("/") == "/stats":
+                    with server.lock:
+                        self._send_json(200, dict(server.stats))
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self._send_json(404, {"error": "not found"})
+                    return
+
+                content = server.respond(request.get("messages", []), request.get("response_format"))
+                time.sleep(server.latency)
+                created = int(time.time())
+                model = request.get("model", "fake")
+
+                if not request.get("stream"):
+                    time.sleep(estimate_tokens(content) / server.tokens_per_second)
+                    self._send_json(200, {
+                        "id": "fake", "object": "chat.completion", "created": created, "model": model,
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                     "finish_reason": "stop"}],
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                # Stream roughly one token (four characters) per event
+                for start in range(0, len(content), 4):
+                    chunk = {
+                        "id": "fake", "object": "chat.completion.chunk", "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": {"content": content[start:start + 4]},
+                                     "finish_reason": None}],
+                    }
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    time.sleep(1 / server.tokens_per_second)
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI-compatible server.")
+    parser.add_argument("--files", type=int, default=5, help="Number of files in the canned project tree.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token.")
+    parser.add_argument("--tokens-per-second", type=float, default=500.0)
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+
+    fake = FakeLLMServer(args.files, args.latency, args.tokens_per_second, port=args.port).start()
+    print(f"Fake LLM server listening on {fake.base_url}")
+    try:
+        fake.thread.join()
+    except KeyboardInterrupt:
+        fake.stop()
+        sys.exit(0)
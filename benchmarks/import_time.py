@@ -0,0 +1,80 @@
+"""
+Import-time report for `app.py`, based on `python -X importtime`.
+
+Imports the module in a fresh interpreter, lists the slowest imports and fails
+if the total exceeds the budget or a heavy dependency is loaded eagerly.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --module app --budget-ms 300 --top 15
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies that must only be imported on first use
+HEAVY_MODULES = ("gradio", "pandas", "openai", "huggingface_hub", "tiktoken", "httpx", "multiprocessing")
+
+
+def measure(module: str) -> tuple:
+    """
+    Import a module in a fresh interpreter with `-X importtime`.
+
+    Returns:
+        tuple: (rows of (cumulative microseconds, self microseconds, depth, name),
+                the top-level modules loaded).
+    """
+    code = f"import sys; import {module}; print(','.join(sorted(sys.modules)))"
+    env = dict(os.environ, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "unused"))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative_us), int(self_us), depth, name.strip()))
+    loaded = {name.split(".")[0] for name in result.stdout.strip().split(",")}
+    return rows, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the import time of the application.")
+    parser.add_argument("--module", default="app", help="Module to import.")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "300")),
+                        help="Maximum total import time.")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs; the fastest is reported.")
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.repeat)]
+    rows, loaded = min(runs, key=lambda run: max((row[0] for row in run[0] if row[3] == args.module), default=0))
+    total_ms = max((row[0] for row in rows if row[3] == args.module), default=0) / 1000
+
+    print(f"Import time of {args.module}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)\n")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, _, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.1f} ms exceeds the budget of {args.budget_ms:.0f} ms")
+    eager = sorted(loaded.intersection(HEAVY_MODULES))
+    if eager:
+        failures.append(f"heavy modules imported eagerly: {', '.join(eager)}")
+    for failure in failures:
+        print(f"\nFAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
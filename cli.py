@@ -0,0 +1,215 @@
+"""
+Headless batch generation: run Step 1 -> Step 4 for many project specs.
+
+Each line of the specs file is a JSON object with an `instruction`, a `framework`
+and an optional `id`. Every spec is built in its own folder under the output
+directory. Progress is checkpointed after each step and, through the build
+manifest, after each generated file, so rerunning an interrupted batch resumes
+where it stopped.
+
+Usage:
+    python cli.py specs.jsonl --output batch_output --concurrency 4
+    python cli.py specs.jsonl --output batch_output --fresh   # Ignore checkpoints
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import hashlib
+
+from utils.jobs import JOB_WORKERS, SAFE_SESSION_ID, JobManager
+
+STEPS = ("step_1", "step_2", "step_3", "step_4")
+
+
+def load_specs(specs_path: str) -> list:
+    """
+    Read the project specs of a JSONL file and give each a stable ID.
+
+    IDs name the spec's folder, so they follow the workspace rule: 1 to 64
+    letters, digits, "_" or "-".
+
+    Args:
+        specs_path (str): Path of the JSONL file.
+
+    Returns:
+        list: The spec dictionaries, each with an 'id'.
+    """
+    specs, seen = [], set()
+    with open(specs_path, "r", encoding="utf-8") as file:
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                spec = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{specs_path}:{number}: invalid JSON: {e}") from e
+            if not spec.get("instruction") or not spec.get("framework"):
+                raise ValueError(f"{specs_path}:{number}: 'instruction' and 'framework' are required")
+            if not spec.get("id"):
+                # Derived from the content, so reordering the file doesn't break resuming
+                digest = hashlib.sha256(f"{spec['framework']}\n{spec['instruction']}".encode("utf-8")).hexdigest()
+                slug = re.sub(r"[^a-z0-9]+", "-", spec["instruction"].lower()).strip("-")[:40]
+                spec["id"] = f"{slug}-{digest[:8]}"
+            spec["id"] = str(spec["id"])
+            if not SAFE_SESSION_ID.fullmatch(spec["id"]):
+                raise ValueError(
+                    f"{specs_path}:{number}: invalid spec id '{spec['id']}'; "
+                    f"use 1 to 64 letters, digits, '_' or '-'"
+                )
+            if spec["id"] in seen:
+                raise ValueError(f"{specs_path}:{number}: duplicate spec id '{spec['id']}'")
+            seen.add(spec["id"])
+            specs.append(spec)
+    return specs
+
+
+def load_state(state_path: str) -> dict:
+    try:
+        with open(state_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state_path: str, state: dict):
+    """
+    Write a spec's checkpoint atomically.
+    """
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(state, file, indent=2)
+    os.replace(temp_path, state_path)
+
+
+async def run_spec(app, jobs: JobManager, spec: dict, express: bool = False) -> dict:
+    """
+    Run the pipeline steps a spec hasn't completed yet.
+
+    Returns:
+        dict: The final state of the spec.
+    """
+    workspace = jobs.workspace(spec["id"])
+    state_path = os.path.join(workspace.root, "state.json")
+    state = load_state(state_path)
+    if state.get("spec", {}).get("instruction") != spec["instruction"]:
+        state = {}  # The spec changed; start over
+    state.update(spec=spec, status="running", error=None, updated=time.time())
+    state.setdefault("completed", [])
+    save_state(state_path, state)
+
+    try:
+        for step in STEPS:
+            if step in state["completed"]:
+                continue
+            start = time.perf_counter()
+            if step == "step_1":
+                await jobs.run(spec["id"], app.step_1, spec["instruction"], spec["framework"], express)
+                if not jobs.call(spec["id"], lambda: app.get_store().load_tree()):
+                    raise ValueError("The model did not return a valid project tree")
+            elif step == "step_2":
+                # Files recorded in the build manifest are reused, so this resumes mid-build
+                status = None
+                async for status, _ in jobs.stream(spec["id"], app.step_2):
+                    pass
+                # The recorded run tells whether every file was generated; failed files are retried on rerun
+                runs = jobs.call(spec["id"], lambda: app.get_store().runs(1))
+                if not runs or runs[0]["status"] != "succeeded":
+                    raise RuntimeError(f"Generation failed: {status}")
+            elif step == "step_3":
+                validation = await jobs.run(spec["id"], app.step_3)
+                state["invalid_files"] = validation.loc[~validation["validation"], "path"].tolist()
+            else:
+                message, archive_path = await jobs.run(spec["id"], app.step_4)
+                if archive_path is None:
+                    raise RuntimeError(message)
+                state["archive"] = archive_path
+            state["completed"].append(step)
+            state.setdefault("seconds", {})[step] = round(time.perf_counter() - start, 3)
+            state["updated"] = time.time()
+            save_state(state_path, state)
+        state["status"] = "done"
+    except asyncio.CancelledError:
+        state["status"] = "interrupted"
+        raise
+    except Exception as e:
+        state.update(status="failed", error=f"{type(e).__name__}: {e}")
+    finally:
+        state["updated"] = time.time()
+        save_state(state_path, state)
+    return state
+
+
+async def run_batch(specs: list, output: str, concurrency: int, express: bool = False) -> list:
+    """
+    Run every spec, at most `concurrency` pipeline steps at a time.
+
+    Returns:
+        list: The final state of each spec.
+    """
+    import app
+    from utils.ratelimit import BATCH, request_priority
+
+    # Jobs copy this context, so interactive UI requests in the same process go first
+    request_priority.set(BATCH)
+    # Workspaces hold the results, so they are never collected
+    jobs = JobManager(root=output, workers=concurrency, idle_timeout=float("inf"))
+
+    async def run_and_report(spec):
+        state = await run_spec(app, jobs, spec, express)
+        print(f"[{state['status']}] {spec['id']}" + (f": {state['error']}" if state.get("error") else ""),
+              file=sys.stderr)
+        return state
+
+    try:
+        return await asyncio.gather(*(run_and_report(spec) for spec in specs))
+    finally:
+        from utils.llm import close_clients
+        await close_clients()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate many projects from a JSONL file of specs.")
+    parser.add_argument("specs", help="JSONL file with one {instruction, framework[, id]} object per line.")
+    parser.add_argument("--output", default="batch_output", help="Directory receiving one folder per spec.")
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKERS,
+                        help="Maximum number of pipeline steps running at the same time.")
+    parser.add_argument("--fresh", action="store_true", help="Discard checkpoints and rebuild every spec.")
+    parser.add_argument("--express", action="store_true",
+                        help="Start generating leaf files while the project tree is still streaming.")
+    args = parser.parse_args()
+
+    specs = load_specs(args.specs)
+    os.makedirs(args.output, exist_ok=True)
+    pending = []
+    for spec in specs:
+        spec_dir = os.path.join(args.output, spec["id"])
+        if args.fresh:
+            shutil.rmtree(spec_dir, ignore_errors=True)
+        elif load_state(os.path.join(spec_dir, "state.json")).get("status") == "done":
+            print(f"[done] {spec['id']} (skipped, already complete)", file=sys.stderr)
+            continue
+        pending.append(spec)
+
+    start = time.perf_counter()
+    try:
+        states = asyncio.run(run_batch(pending, args.output, args.concurrency, args.express))
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume.", file=sys.stderr)
+        sys.exit(130)
+
+    failed = [state for state in states if state["status"] != "done"]
+    print(
+        f"{len(states) - len(failed)}/{len(states)} projects built in {time.perf_counter() - start:.1f}s "
+        f"({len(specs) - len(pending)} already complete)",
+        file=sys.stderr,
+    )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
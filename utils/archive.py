@@ -0,0 +1,284 @@
+import os
+import time
+import zlib
+import struct
+import hashlib
+import tarfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from utils.logger import get_logger
+
+# Cache of compressed archive entries, shared by all projects
+ARCHIVE_CACHE_DIR = os.getenv("ARCHIVE_CACHE_DIR", os.path.join(".cache", "archive"))
+ARCHIVE_CACHE_MAX_BYTES = int(os.getenv("ARCHIVE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# "zip", or "tar.zst" when the zstandard package is installed
+ARCHIVE_FORMAT = os.getenv("ARCHIVE_FORMAT", "zip").lower()
+ARCHIVE_WORKERS = int(os.getenv("ARCHIVE_WORKERS", str(min(4, os.cpu_count() or 1))))
+COMPRESSION_LEVEL = 6
+ZIP_MAX_SIZE = 0xFFFFFFFF
+
+logger = get_logger(__name__)
+
+# Project state files that are not part of the exported project
+EXCLUDED_NAMES = {"project.db", "project.db-wal", "project.db-shm", "project.db-journal", "manifest.json"}
+
+
+def dos_datetime(timestamp: float) -> tuple:
+    """
+    Convert a timestamp to the (time, date) fields of a zip header.
+    """
+    local = time.localtime(max(timestamp, 315532800))  # Zip dates start in 1980
+    dos_time = (local.tm_hour << 11) | (local.tm_min << 5) | (local.tm_sec // 2)
+    dos_date = ((local.tm_year - 1980) << 9) | (local.tm_mon << 5) | local.tm_mday
+    return dos_time, dos_date
+
+
+class EntryCache:
+    """
+    Compressed zip entries on disk, addressed by the hash of their content.
+
+    Files are touched when reused, and the least recently used are evicted once
+    the cache grows over its size limit.
+    """
+
+    def __init__(self, directory: str = ARCHIVE_CACHE_DIR, max_bytes: int = ARCHIVE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.deflate")
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            os.utime(path)  # Mark as recently used
+            return data
+        except OSError:
+            return None
+
+    def set(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{id(data)}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache is under its size limit.
+        """
+        if not os.path.isdir(self.directory):
+            return
+        entries = []
+        for shard in os.scandir(self.directory):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+def list_entries(root_dir: str, excluded_names=EXCLUDED_NAMES) -> list:
+    """
+    List the directories and files to archive as (archive name, full path) tuples.
+    """
+    entries = []
+    for directory, dirnames, filenames in os.walk(root_dir):
+        dirnames.sort()
+        relative = os.path.relpath(directory, root_dir)
+        if relative != os.curdir:
+            entries.append((relative.replace(os.sep, "/") + "/", directory))
+        for filename in sorted(filenames):
+            if relative == os.curdir and filename in excluded_names:
+                continue
+            name = filename if relative == os.curdir else os.path.join(relative, filename)
+            entries.append((name.replace(os.sep, "/"), os.path.join(directory, filename)))
+    return entries
+
+
+def _prepare_entry(name: str, full_path: str, cache: EntryCache) -> tuple:
+    """
+    Read and compress one file, reusing its compressed form from the cache.
+
+    Returns:
+        tuple: (name, method, crc, uncompressed size, data, stat result, whether
+            the compressed data came from the cache).
+    """
+    stat = os.stat(full_path)
+    if name.endswith("/"):
+        return name, 0, 0, 0, b"", stat, False
+    with open(full_path, "rb") as file:
+        content = file.read()
+    if len(content) > ZIP_MAX_SIZE:
+        raise ValueError(f"{name} is too large for a zip archive without zip64")
+    crc = zlib.crc32(content)
+    key = hashlib.sha256(content).hexdigest() + f"-{COMPRESSION_LEVEL}"
+
+    data = cache.get(key) if cache is not None else None
+    reused = data is not None
+    if not reused:
+        # zlib releases the GIL, so worker threads compress in parallel
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -15)
+        data = compressor.compress(content) + compressor.flush()
+        if cache is not None:
+            cache.set(key, data)
+    if len(data) >= len(content):
+        return name, 0, crc, len(content), content, stat, reused  # Stored: compression doesn't help
+    return name, 8, crc, len(content), data, stat, reused
+
+
+def iter_zip(root_dir: str, cache: EntryCache = None, workers: int = ARCHIVE_WORKERS, stats: dict = None):
+    """
+    Generate a zip archive of a directory as a stream of byte chunks.
+
+    Entries are compressed by a thread pool a few files ahead of the one being
+    written, and unchanged files reuse their compressed form from `cache`.
+
+    Args:
+        root_dir (str): The directory to archive.
+        cache (EntryCache): Cache of compressed entries, or None.
+        workers (int): Number of compression threads.
+        stats (dict): Optional dictionary receiving 'entries', 'reused',
+            'compressed' and 'bytes' counts.
+
+    Yields:
+        bytes: Consecutive parts of the archive.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(entries=0, reused=0, compressed=0, bytes=0)
+    central, offset = [], 0
+    entries = list_entries(root_dir)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        window = deque()
+        pending = iter(entries)
+        while True:
+            # Keep a bounded number of entries in flight to limit memory use
+            while len(window) < max(1, workers) * 2:
+                entry = next(pending, None)
+                if entry is None:
+                    break
+                window.append(pool.submit(_prepare_entry, *entry, cache))
+            if not window:
+                break
+            name, method, crc, size, data, stat, reused = window.popleft().result()
+            if not name.endswith("/"):
+                stats["reused" if reused else "compressed"] += 1
+
+            encoded = name.encode("utf-8")
+            dos_time, dos_date = dos_datetime(stat.st_mtime)
+            header = struct.pack(
+                "<IHHHHHIIIHH", 0x04034B50, 20, 0x0800, method, dos_time, dos_date,
+                crc, len(data), size, len(encoded), 0,
+            ) + encoded
+            external = (stat.st_mode & 0xFFFF) << 16 | (0x10 if name.endswith("/") else 0)
+            central.append(struct.pack(
+                "<IHHHHHHIIIHHHHHII", 0x02014B50, (3 << 8) | 20, 20, 0x0800, method, dos_time, dos_date,
+                crc, len(data), size, len(encoded), 0, 0, 0, 0, external, offset,
+            ) + encoded)
+            offset += len(header) + len(data)
+            if offset > ZIP_MAX_SIZE:
+                raise ValueError("The archive is too large for zip without zip64")
+            stats["entries"] += 1
+            yield header
+            yield data
+
+    directory = b"".join(central)
+    yield directory + struct.pack(
+        "<IHHHHIIH", 0x06054B50, 0, 0, len(central), len(central), len(directory), offset, 0,
+    )
+    stats["bytes"] = offset + len(directory) + 22
+
+
+def iter_tar_zst(root_dir: str, level: int = 3, stats: dict = None):
+    """
+    Generate a zstandard-compressed tar archive of a directory as a stream of byte chunks.
+
+    Requires the `zstandard` package.
+
+    Yields:
+        bytes: Consecutive parts of the archive.
+    """
+    import zstandard
+
+    class Sink:
+        def __init__(self):
+            self.chunks = []
+
+        def write(self, data):
+            self.chunks.append(bytes(data))
+            return len(data)
+
+    stats = stats if stats is not None else {}
+    stats.update(entries=0, bytes=0)
+    sink = Sink()
+    compressor = zstandard.ZstdCompressor(level=level, threads=-1)
+    with compressor.stream_writer(sink, closefd=False) as writer:
+        with tarfile.open(fileobj=writer, mode="w|") as tar:
+            for name, full_path in list_entries(root_dir):
+                tar.add(full_path, arcname=name.rstrip("/"), recursive=False)
+                stats["entries"] += 1
+                if sink.chunks:
+                    chunks, sink.chunks = sink.chunks, []
+                    stats["bytes"] += sum(len(chunk) for chunk in chunks)
+                    yield b"".join(chunks)
+    stats["bytes"] += sum(len(chunk) for chunk in sink.chunks)
+    yield b"".join(sink.chunks)
+
+
+def archive_format(requested: str = ARCHIVE_FORMAT) -> str:
+    """
+    Return the archive format to use, falling back to zip without zstandard.
+    """
+    if requested == "tar.zst":
+        try:
+            import zstandard  # noqa: F401
+            return "tar.zst"
+        except ImportError:
+            logger.warning("zstandard is not installed, writing a zip archive instead")
+    return "zip"
+
+
+def write_archive(root_dir: str, base_name: str, format: str = None, cache: EntryCache = None) -> tuple:
+    """
+    Stream an archive of a directory to `base_name` plus the format's extension.
+
+    The archive is written to a temporary file and moved into place, so a
+    download never sees a partially written archive.
+
+    Args:
+        root_dir (str): The directory to archive.
+        base_name (str): The archive path without extension.
+        format (str): "zip" or "tar.zst"; defaults to ARCHIVE_FORMAT.
+        cache (EntryCache): Cache of compressed zip entries, or None.
+
+    Returns:
+        tuple: The archive path and the statistics of the build.
+    """
+    format = archive_format(format or ARCHIVE_FORMAT)
+    archive_path = f"{base_name}.{format}"
+    stats = {}
+    chunks = iter_tar_zst(root_dir, stats=stats) if format == "tar.zst" else iter_zip(root_dir, cache, stats=stats)
+    temp_path = f"{archive_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+        os.replace(temp_path, archive_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    if cache is not None:
+        cache.evict()
+    return archive_path, stats
@@ -0,0 +1,249 @@
+import os
+import json
+import time
+import hashlib
+import contextvars
+from contextlib import contextmanager
+from utils.metrics import annotate
+
+# On-disk cache of LLM responses
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", os.path.join(".cache", "llm"))
+# "on" caches responses, "off" disables the cache, "replay" never calls the provider
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "on").lower()
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+LLM_CACHE_MAX_AGE = float(os.getenv("LLM_CACHE_MAX_AGE", str(30 * 24 * 3600)))
+
+
+# Keys of the responses served in the current `response_scope`, if any
+_scope_keys = contextvars.ContextVar("cache_scope_keys", default=None)
+
+
+class CacheMissError(RuntimeError):
+    """
+    Raised in replay mode when a prompt has no cached response.
+    """
+
+
+def cache_key(model: str, parameters: dict, prompt: str) -> str:
+    """
+    Compute the content address of a request.
+
+    Args:
+        model (str): The model name.
+        parameters (dict): Generation parameters that affect the output.
+        prompt (str): The full prompt, including any system message.
+
+    Returns:
+        str: A hex SHA-256 digest.
+    """
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    payload = json.dumps({"model": model, "parameters": parameters or {}, "prompt": prompt_hash}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Content-addressed LLM response cache with size and age based LRU eviction.
+
+    Entries are JSON files named after their key. The file mtime records the last
+    access, so eviction removes the least recently used entries first.
+    """
+
+    def __init__(self, directory: str = LLM_CACHE_DIR, mode: str = LLM_CACHE_MODE,
+                 max_bytes: int = LLM_CACHE_MAX_BYTES, max_age: float = LLM_CACHE_MAX_AGE):
+        self.directory = directory
+        self.mode = mode
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._total_bytes = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("on", "replay")
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _entries(self) -> list:
+        """
+        List cached entries as (path, size, mtime) tuples.
+        """
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def get(self, key: str):
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): The key from `cache_key`.
+
+        Returns:
+            str: The cached response, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                entry = json.load(file)
+            if self.mode != "replay" and time.time() - entry.get("created", 0) > self.max_age:
+                raise FileNotFoundError(path)
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError):
+            self.stats["misses"] += 1
+            if self.mode == "replay":
+                raise CacheMissError(f"No cached response for request {key[:12]} in replay mode.")
+            return None
+        self.stats["hits"] += 1
+        return entry["response"]
+
+    def set(self, key: str, response: str, model: str = ""):
+        """
+        Store a response and evict old entries if the cache is over its limits.
+
+        Args:
+            key (str): The key from `cache_key`.
+            response (str): The response text.
+            model (str): The model name, kept for inspection.
+        """
+        if self.mode != "on":
+            return
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"model": model, "created": time.time(), "response": response}, file)
+        os.replace(temp_path, path)
+        self.stats["stores"] += 1
+
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+        else:
+            self._total_bytes += os.path.getsize(path)
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def delete(self, key: str):
+        """
+        Remove the entry of a key, if any. Recorded entries are kept in replay mode.
+        """
+        if self.mode != "on":
+            return
+        path = self._entry_path(key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        if self._total_bytes is not None:
+            self._total_bytes -= size
+
+    def evict(self):
+        """
+        Remove expired entries, then least recently used ones until under the size limit.
+        """
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        now = time.time()
+        for path, size, mtime in entries:
+            if total <= self.max_bytes and now - mtime <= self.max_age:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.stats["evictions"] += 1
+        self._total_bytes = total
+
+    def clear(self):
+        """
+        Remove every cached entry.
+        """
+        for path, _, _ in self._entries():
+            os.remove(path)
+        self._total_bytes = 0
+
+
+def record_response(cache: ResponseCache, key: str):
+    """
+    Note that the response of `key` was served, so the enclosing `response_scope` can reject it.
+    """
+    keys = _scope_keys.get()
+    if keys is not None:
+        keys.append((cache, key))
+
+
+class ResponseScope:
+    """
+    The cached responses served while a `response_scope` block ran.
+    """
+
+    def __init__(self):
+        self.keys = []
+
+    def reject(self):
+        """
+        Remove the responses from the cache, so the same requests are sent to the provider again.
+        """
+        for cache, key in self.keys:
+            cache.delete(key)
+        self.keys.clear()
+
+
+@contextmanager
+def response_scope():
+    """
+    Track the responses served in a block, so a caller that finds them unusable
+    (no code block, invalid JSON, ...) can keep them out of the cache.
+
+    Tasks started inside the block share its scope.
+
+    Yields:
+        ResponseScope: Call `reject()` to drop the responses from the cache.
+    """
+    scope = ResponseScope()
+    token = _scope_keys.set(scope.keys)
+    try:
+        yield scope
+    finally:
+        _scope_keys.reset(token)
+
+
+async def cached_call(cache: ResponseCache, model: str, parameters: dict, prompt: str, call) -> str:
+    """
+    Return the cached response for a request, or await `call()` and cache its result.
+
+    Args:
+        cache (ResponseCache): The cache to use.
+        model (str): The model name.
+        parameters (dict): Generation parameters that affect the output.
+        prompt (str): The full prompt.
+        call: Async callable without arguments performing the request.
+
+    Returns:
+        str: The response text.
+    """
+    key = cache_key(model, parameters, prompt)
+    cached = cache.get(key)
+    if cached is not None:
+        annotate("cache_hits")
+        record_response(cache, key)
+        return cached
+    if cache.enabled:
+        annotate("cache_misses")
+    response = await call()
+    cache.set(key, response, model=model)
+    record_response(cache, key)
+    return response
@@ -0,0 +1,168 @@
+import os
+import re
+import math
+from utils.scheduler import mention_patterns
+
+# Maximum number of tokens of dependency code included in a single prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+
+# Weights of the relevance signals used to rank dependencies
+MENTION_WEIGHT = 3.0
+PROXIMITY_WEIGHT = 1.0
+BM25_WEIGHT = 1.0
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_encoding = None  # Loaded on first use; False when tiktoken isn't installed
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens of a text for the GPT-4o tokenizer.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: Exact token count if `tiktoken` is installed, otherwise an estimate.
+    """
+    global _encoding
+    if not text:
+        return 0
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except ImportError:  # Fall back to a character-based estimate
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    # Roughly four characters per token for code and English text
+    return math.ceil(len(text) / 4)
+
+
+def tokenize(text: str) -> list:
+    """
+    Split text into lowercase word terms, breaking snake_case and camelCase identifiers.
+    """
+    words = re.findall(r"[A-Za-z][a-z0-9]*|[A-Z]+(?![a-z])|\d+", text or "")
+    return [word.lower() for word in words if len(word) > 1]
+
+
+def bm25_scores(query: str, documents: dict) -> dict:
+    """
+    Score documents against a query with Okapi BM25.
+
+    Args:
+        query (str): The query text.
+        documents (dict): Maps a document key to its text.
+
+    Returns:
+        dict: Maps each document key to its BM25 score.
+    """
+    terms = set(tokenize(query))
+    tokenized = {key: tokenize(text) for key, text in documents.items()}
+    if not terms or not tokenized:
+        return {key: 0.0 for key in documents}
+
+    average_length = sum(len(words) for words in tokenized.values()) / len(tokenized) or 1.0
+    document_frequency = {term: sum(1 for words in tokenized.values() if term in words) for term in terms}
+    total = len(tokenized)
+
+    scores = {}
+    for key, words in tokenized.items():
+        frequencies = {}
+        for word in words:
+            if word in terms:
+                frequencies[word] = frequencies.get(word, 0) + 1
+        score = 0.0
+        for term, frequency in frequencies.items():
+            idf = math.log(1 + (total - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+            norm = frequency + BM25_K1 * (1 - BM25_B + BM25_B * len(words) / average_length)
+            score += idf * frequency * (BM25_K1 + 1) / norm
+        scores[key] = score
+    return scores
+
+
+def path_proximity(path: str, other: str) -> float:
+    """
+    Measure how close two files are in the directory tree.
+
+    Returns:
+        float: 1.0 for files in the same directory, decreasing with tree distance.
+    """
+    parts = os.path.dirname(os.path.normpath(path)).split(os.sep)
+    other_parts = os.path.dirname(os.path.normpath(other)).split(os.sep)
+    common = 0
+    for part, other_part in zip(parts, other_parts):
+        if part != other_part:
+            break
+        common += 1
+    distance = (len(parts) - common) + (len(other_parts) - common)
+    return 1.0 / (1 + distance)
+
+
+def rank_dependencies(path: str, description: str, candidates: dict) -> list:
+    """
+    Rank previously generated files by their relevance to the file being generated.
+
+    Combines explicit mentions in the description, directory proximity and BM25
+    lexical similarity between the target path/description and each candidate.
+
+    Args:
+        path (str): Path of the file being generated.
+        description (str): Description of the file being generated.
+        candidates (dict): Maps dependency paths to their code.
+
+    Returns:
+        list: Candidate paths, most relevant first.
+    """
+    query = f"{path} {description}"
+    documents = {dep: f"{dep}\n{code}" for dep, code in candidates.items()}
+    lexical = bm25_scores(query, documents)
+    top = max(lexical.values(), default=0.0) or 1.0
+
+    scores = {}
+    for dep in candidates:
+        mentioned = any(pattern.search(description or "") for pattern in mention_patterns(dep))
+        scores[dep] = (
+            MENTION_WEIGHT * mentioned
+            + PROXIMITY_WEIGHT * path_proximity(path, dep)
+            + BM25_WEIGHT * lexical[dep] / top
+        )
+    return sorted(candidates, key=lambda dep: (-scores[dep], dep))
+
+
+def build_dependency_context(path: str, description: str, candidates: dict,
+                             budget: int = CONTEXT_TOKEN_BUDGET) -> tuple:
+    """
+    Build the dependency section of a generation prompt within a token budget.
+
+    Args:
+        path (str): Path of the file being generated.
+        description (str): Description of the file being generated.
+        candidates (dict): Maps dependency paths to their code.
+        budget (int): Maximum number of tokens for the dependency section.
+
+    Returns:
+        tuple: The dependency text and a stats dictionary with the number of included
+               and available files, the tokens used and the tokens saved.
+    """
+    sections = {dep: f"### Dependency: {dep}\n{code}" for dep, code in candidates.items()}
+    costs = {dep: count_tokens(section) for dep, section in sections.items()}
+
+    included, used = [], 0
+    for dep in rank_dependencies(path, description, candidates):
+        # Skip files that don't fit, smaller ones further down may still do
+        if used + costs[dep] > budget:
+            continue
+        included.append(dep)
+        used += costs[dep]
+
+    stats = {
+        "included": len(included),
+        "available": len(candidates),
+        "tokens_used": used,
+        "tokens_saved": sum(costs.values()) - used,
+    }
+    return "\n".join(sections[dep] for dep in included), stats
@@ -0,0 +1,325 @@
+import os
+import sys
+import mmap
+import codecs
+import hashlib
+import threading
+
+# Directories that are never indexed
+IGNORED_DIRS = {"node_modules", ".git", "__pycache__", ".venv", "venv", ".mypy_cache", ".pytest_cache"}
+# Largest number of bytes shown when previewing a file
+PREVIEW_MAX_BYTES = int(os.getenv("PREVIEW_MAX_BYTES", str(512 * 1024)))
+# Files at least this large are memory-mapped instead of read
+MMAP_THRESHOLD = 64 * 1024
+BINARY_SAMPLE_BYTES = 8192
+
+
+def scan_directory(base_path: str, ignored_dirs=IGNORED_DIRS) -> list:
+    """
+    Index a directory tree without reading any file content.
+
+    Args:
+        base_path (str): The root directory path to scan.
+        ignored_dirs (set): Directory names that are skipped entirely.
+
+    Returns:
+        list: One dictionary per entry with 'path', 'size', 'mtime' and 'type'
+              ('file' or 'directory'), sorted by path.
+    """
+    entries = []
+    stack = [base_path]
+    while stack:
+        current = stack.pop()
+        try:
+            iterator = os.scandir(current)
+        except OSError:
+            continue
+        with iterator:
+            for entry in iterator:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name in ignored_dirs:
+                            continue
+                        stat = entry.stat(follow_symlinks=False)
+                        entries.append({"path": entry.path, "size": 0, "mtime": stat.st_mtime, "type": "directory"})
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        entries.append({"path": entry.path, "size": stat.st_size, "mtime": stat.st_mtime, "type": "file"})
+                except OSError:
+                    continue
+    entries.sort(key=lambda entry: entry["path"])
+    return entries
+
+
+def is_binary(sample: bytes) -> bool:
+    """
+    Guess whether a byte sample comes from a binary file.
+
+    Args:
+        sample (bytes): The first bytes of the file.
+
+    Returns:
+        bool: True if the sample contains NUL bytes or mostly non-text bytes.
+    """
+    if not sample:
+        return False
+    if b"\0" in sample:
+        return True
+    try:
+        sample.decode("utf-8")
+        return False
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut at the end of the sample is still text
+        if e.start >= len(sample) - 3:
+            return False
+    text_bytes = bytes(range(32, 127)) + b"\n\r\t\f\b"
+    non_text = sum(1 for byte in sample if byte not in text_bytes)
+    return non_text / len(sample) > 0.3
+
+
+def read_preview(file_path: str, max_bytes: int = PREVIEW_MAX_BYTES) -> str:
+    """
+    Read a file for display, without loading more than `max_bytes` into memory.
+
+    Large files are memory-mapped and only their first `max_bytes` are decoded.
+
+    Args:
+        file_path (str): The file to read.
+        max_bytes (int): Maximum number of bytes to show.
+
+    Returns:
+        str: The file content, a truncation notice, or a notice for binary files.
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as file:
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                data = mapped[:max_bytes]
+        else:
+            data = file.read(max_bytes)
+
+    if is_binary(data[:BINARY_SAMPLE_BYTES]):
+        return f"Binary file ({size} bytes), preview not available."
+    # A non-final decode drops a multi-byte character cut by the size cap
+    text = codecs.getincrementaldecoder("utf-8")("replace").decode(data, final=size <= max_bytes)
+    if size > max_bytes:
+        text += f"\n\n... truncated: showing the first {max_bytes} of {size} bytes."
+    return text
+
+
+def file_hash(file_path: str) -> str:
+    """
+    Hash a file's bytes with SHA-256, reading it in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DirectoryIndex:
+    """
+    Snapshot of a directory tree (path -> size, mtime, type, hash) that is refreshed
+    incrementally.
+
+    `refresh` compares the tree with the previous snapshot and only hashes files
+    whose size or mtime changed. When `watchdog` is installed and `watch` was
+    called, file system events (inotify on Linux) mark the dirty paths, so a
+    refresh doesn't even rescan the tree. Writers that know what they wrote can
+    push it with `record`.
+    """
+
+    def __init__(self, base_path: str, ignored_dirs=IGNORED_DIRS):
+        self.base_path = os.path.abspath(base_path)
+        self.ignored_dirs = ignored_dirs
+        self.entries = {}
+        self.previews = {}
+        self.lock = threading.Lock()
+        self._dirty = set()
+        self._observer = None
+        self._scanned = False
+
+    def _contains(self, path: str) -> bool:
+        relative = os.path.relpath(path, self.base_path)
+        if relative == os.curdir or relative.startswith(os.pardir):
+            return False
+        return not any(part in self.ignored_dirs for part in relative.split(os.sep))
+
+    def watch(self) -> bool:
+        """
+        Start watching the directory for changes, if `watchdog` is installed.
+
+        Returns:
+            bool: True if a watcher is running.
+        """
+        if self._observer is not None:
+            return True
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return False
+
+        index = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                with index.lock:
+                    for path in (event.src_path, getattr(event, "dest_path", "")):
+                        if path:
+                            index._dirty.add(os.path.abspath(path))
+
+        os.makedirs(self.base_path, exist_ok=True)
+        observer = Observer()
+        observer.schedule(Handler(), self.base_path, recursive=True)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        return True
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+
+    def _stat_entry(self, path: str):
+        """
+        Build the entry of a path from its metadata, reusing the hash if unchanged.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if os.path.isdir(path):
+            return {"path": path, "size": 0, "mtime": stat.st_mtime, "type": "directory", "hash": None}
+        previous = self.entries.get(path)
+        if previous is not None and (previous["size"], previous["mtime"]) == (stat.st_size, stat.st_mtime):
+            return previous
+        try:
+            digest = file_hash(path)
+        except OSError:
+            return None
+        return {"path": path, "size": stat.st_size, "mtime": stat.st_mtime, "type": "file", "hash": digest}
+
+    def _apply(self, path: str, entry, changes: dict):
+        previous = self.entries.get(path)
+        if entry is None:
+            if previous is not None:
+                del self.entries[path]
+                self.previews.pop(path, None)
+                changes["removed"].append(path)
+            return
+        self.entries[path] = entry
+        if previous is None:
+            changes["added"].append(path)
+        elif entry["hash"] != previous["hash"] or entry["type"] != previous["type"]:
+            self.previews.pop(path, None)
+            changes["modified"].append(path)
+
+    def refresh(self) -> dict:
+        """
+        Bring the snapshot up to date with the directory.
+
+        Returns:
+            dict: Lists of 'added', 'removed' and 'modified' paths.
+        """
+        changes = {"added": [], "removed": [], "modified": []}
+        with self.lock:
+            dirty, self._dirty = self._dirty, set()
+            if self._observer is not None and self._scanned:
+                # Only the paths reported by the watcher (and below dirty directories) changed
+                for path in sorted(dirty):
+                    if not self._contains(path):
+                        continue
+                    if os.path.isdir(path):
+                        for item in scan_directory(path, self.ignored_dirs):
+                            self._apply(item["path"], self._stat_entry(item["path"]), changes)
+                    elif not os.path.exists(path):
+                        prefix = path + os.sep
+                        for known in [known for known in self.entries if known.startswith(prefix)]:
+                            self._apply(known, None, changes)
+                    self._apply(path, self._stat_entry(path), changes)
+                return changes
+
+            seen = set()
+            for item in scan_directory(self.base_path, self.ignored_dirs):
+                seen.add(item["path"])
+                previous = self.entries.get(item["path"])
+                if previous is not None and (previous["size"], previous["mtime"], previous["type"]) == (
+                    item["size"], item["mtime"], item["type"]
+                ):
+                    continue
+                self._apply(item["path"], self._stat_entry(item["path"]), changes)
+            for path in [path for path in self.entries if path not in seen]:
+                self._apply(path, None, changes)
+            self._scanned = True
+        return changes
+
+    def record(self, path: str, content: str):
+        """
+        Push a file that was just written into the snapshot without rescanning.
+
+        Args:
+            path (str): The written file.
+            content (str): The content that was written.
+        """
+        path = os.path.abspath(path)
+        if not self._contains(path):
+            return
+        data = content.encode("utf-8")
+        changes = {"added": [], "removed": [], "modified": []}
+        with self.lock:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return
+            # Register parent directories created for the file
+            parent = os.path.dirname(path)
+            while parent != self.base_path and self._contains(parent) and parent not in self.entries:
+                self._apply(parent, self._stat_entry(parent), changes)
+                parent = os.path.dirname(parent)
+            entry = {"path": path, "size": stat.st_size, "mtime": stat.st_mtime, "type": "file",
+                     "hash": hashlib.sha256(data).hexdigest()}
+            self._apply(path, entry, changes)
+            self._dirty.discard(path)
+
+    def snapshot(self) -> list:
+        """
+        Return the entries sorted by path.
+        """
+        with self.lock:
+            return [self.entries[path] for path in sorted(self.entries)]
+
+    def preview(self, path: str) -> str:
+        """
+        Return the preview of an indexed file, cached until the file changes.
+        """
+        with self.lock:
+            entry = self.entries.get(path)
+            cached = self.previews.get(path)
+        if entry is None:
+            raise ValueError(f"{path} is not part of the project.")
+        if entry["type"] == "directory":
+            return ""
+        if cached is not None and cached[0] == entry["hash"]:
+            return cached[1]
+        text = read_preview(path)
+        with self.lock:
+            self.previews[path] = (entry["hash"], text)
+        return text
+
+
+if __name__ == "__main__":
+    # Ensure a directory path is provided as an argument
+    if len(sys.argv) < 2:
+        print("Usage: python utils\\directory_index.py <directory>")
+        sys.exit(1)
+
+    directory_path = sys.argv[1]
+    if os.path.exists(directory_path):
+        for item in scan_directory(directory_path):
+            print(f"{item['type']:<9} {item['size']:>10} {item['path']}")
+    else:
+        print(f"Error: The path '{directory_path}' does not exist.")
@@ -1,17 +1,21 @@
 import os
 import sys
 import pandas as pd
+from utils.logger import get_logger, payload
 
-def display_and_store_directory_content(base_path):
+logger = get_logger(__name__)
+
+def display_and_store_directory_content(base_path, extraction_dir="extraction"):
     """
     Display all paths with directories and files along with their content, 
     and store the information in a Pandas DataFrame.
 
     Args:
         base_path (str): The root directory path to scan.
+        extraction_dir (str): Directory where the pickle file is written.
 
     Returns:
-        None: Prints paths and content, and saves the DataFrame as a pickle file.
+        str: Path of the saved pickle file. Paths and truncated content are logged at debug level.
     """
     data = []  # To store path and content as rows for the DataFrame
 
@@ -20,7 +24,7 @@ def display_and_store_directory_content(base_path):
         for d in dirs:
             dir_path = os.path.join(root, d)
             data.append({"path": dir_path, "content": ""})
-            print(f"Directory: {dir_path}")
+            logger.debug("Directory: %s", dir_path)
 
         # Store files and their content
         for f in files:
@@ -32,16 +36,12 @@ def display_and_store_directory_content(base_path):
                 content = f"Error reading file: {e}"
             
             data.append({"path": file_path, "content": content})
-            print(f"\nFile: {file_path}")
-            print("-" * 40)
-            print(content)
-            print("-" * 40)
+            logger.debug("File: %s %s", file_path, payload(content))
 
     # Create a DataFrame
     df = pd.DataFrame(data)
 
     # Create the 'extraction' directory if it doesn't exist
-    extraction_dir = "extraction"
     if not os.path.exists(extraction_dir):
         os.makedirs(extraction_dir)
 
@@ -51,7 +51,8 @@ def display_and_store_directory_content(base_path):
 
     # Save the DataFrame to a pickle file
     df.to_pickle(output_file)
-    print(f"\nDataFrame saved to {output_file}")
+    logger.info("DataFrame saved to %s", output_file)
+    return output_file
 
 if __name__ == "__main__":
     # Ensure a directory path is provided as an argument
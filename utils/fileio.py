@@ -0,0 +1,194 @@
+import os
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# When written files are flushed to stable storage:
+#   "always" - before each write is reported done (slowest, crash-safe per file)
+#   "batch"  - all pending files at once when `FileWriter.flush` is called, e.g. at the end of a build
+#   "none"   - left to the operating system
+FSYNC_POLICY = os.getenv("FSYNC_POLICY", "batch").lower()
+FILE_WRITE_WORKERS = int(os.getenv("FILE_WRITE_WORKERS", "4"))
+
+# Digest of the files written or checked, keyed by path and validated by (size, mtime)
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _fsync_directory(directory: str):
+    # Makes a rename durable; not supported on every platform
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+def is_unchanged(path: str, data: bytes) -> bool:
+    """
+    Check whether a file already holds exactly `data`, comparing content hashes.
+
+    The digest of a file is remembered with its size and mtime, so a file this
+    module has written or checked isn't read again until it changes.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    if stat.st_size != len(data):
+        return False
+    digest = _digest(data)
+    with _digests_lock:
+        known = _digests.get(path)
+    if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns):
+        return known[2] == digest
+    try:
+        with open(path, "rb") as file:
+            current = _digest(file.read())
+    except OSError:
+        return False
+    with _digests_lock:
+        _digests[path] = (stat.st_size, stat.st_mtime_ns, current)
+    return current == digest
+
+
+def write_atomic(path: str, content, fsync: bool = False) -> bool:
+    """
+    Write a file atomically, skipping the write if the content is unchanged.
+
+    The content goes to a temporary file in the same directory that is renamed
+    over the target, so readers and crashes never see a partially written file.
+    Skipped writes leave the mtime untouched for incremental consumers.
+
+    Args:
+        path (str): The file to write.
+        content (str or bytes): The new content; text is encoded as UTF-8.
+        fsync (bool): Flush the file and the rename to disk before returning.
+
+    Returns:
+        bool: True if the file was written, False if it already held the content.
+    """
+    data = content.encode("utf-8") if isinstance(content, str) else content
+    if is_unchanged(path, data):
+        return False
+    directory = os.path.dirname(path) or os.curdir
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        # Created like a regular file, so the umask applies
+        descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+            if fsync:
+                file.flush()
+                os.fsync(file.fileno())
+        try:
+            os.chmod(temp_path, os.stat(path).st_mode)  # Keep the permissions of the file it replaces
+        except OSError:
+            pass
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    if fsync:
+        _fsync_directory(directory)
+    stat = os.stat(path)
+    with _digests_lock:
+        _digests[path] = (stat.st_size, stat.st_mtime_ns, _digest(data))
+    return True
+
+
+def fsync_files(paths):
+    """
+    Flush files and their directories to disk, ignoring files that have since disappeared.
+    """
+    directories = set()
+    for path in paths:
+        try:
+            descriptor = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.fsync(descriptor)
+        finally:
+            os.close(descriptor)
+        directories.add(os.path.dirname(path) or os.curdir)
+    for directory in directories:
+        _fsync_directory(directory)
+
+
+class FileWriter:
+    """
+    Writes files from async code on a thread pool, atomically and only when changed.
+
+    Writes to the same path are applied in the order they were requested. Under
+    the "batch" fsync policy, written files are flushed to disk together by `flush`.
+    """
+
+    def __init__(self, workers: int = FILE_WRITE_WORKERS, fsync_policy: str = FSYNC_POLICY):
+        self.workers = workers
+        self.fsync_policy = fsync_policy
+        self._pool = None
+        self._tails = {}  # Path -> last write task queued for it
+        self._unsynced = set()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="file-writer")
+        return self._pool
+
+    def write_sync(self, path: str, content) -> bool:
+        """
+        Write a file from synchronous code, with the same policy as `write`.
+        """
+        written = write_atomic(path, content, fsync=self.fsync_policy == "always")
+        if written and self.fsync_policy == "batch":
+            self._unsynced.add(path)
+        return written
+
+    async def _write_after(self, previous, path: str, content) -> bool:
+        if previous is not None:
+            await asyncio.wait([previous])  # Its failure is reported to its own caller
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor(), self.write_sync, path, content)
+
+    async def write(self, path: str, content) -> bool:
+        """
+        Write a file without blocking the event loop.
+
+        Args:
+            path (str): The file to write.
+            content (str or bytes): The new content.
+
+        Returns:
+            bool: True if the file was written, False if it already held the content.
+        """
+        task = asyncio.ensure_future(self._write_after(self._tails.get(path), path, content))
+        self._tails[path] = task
+        try:
+            # A cancelled caller doesn't interrupt the write, so later writes stay ordered
+            return await asyncio.shield(task)
+        finally:
+            if self._tails.get(path) is task and task.done():
+                del self._tails[path]
+
+    async def flush(self):
+        """
+        Wait for the queued writes and, under the "batch" policy, flush the written files to disk.
+        """
+        if self._tails:
+            await asyncio.wait(list(self._tails.values()))
+        if self._unsynced:
+            paths, self._unsynced = self._unsynced, set()
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor(), fsync_files, sorted(paths))
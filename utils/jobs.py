@@ -0,0 +1,243 @@
+import os
+import re
+import time
+import uuid
+import hashlib
+import shutil
+import asyncio
+import inspect
+import contextvars
+
+# Root folder holding one workspace per Gradio session
+WORKSPACES_DIR = os.getenv("WORKSPACES_DIR", "workspaces")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+MAX_JOBS_PER_USER = int(os.getenv("MAX_JOBS_PER_USER", "1"))
+WORKSPACE_IDLE_TIMEOUT = float(os.getenv("WORKSPACE_IDLE_TIMEOUT", "3600"))
+
+# Workspace of the job running in the current context; None outside of a job
+current_workspace = contextvars.ContextVar("current_workspace", default=None)
+
+SAFE_SESSION_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+def safe_session_id(session_id) -> str:
+    """
+    Map a client-provided session ID to a name that is safe as a folder name.
+
+    IDs made of letters, digits, "_" and "-" are kept; anything else (including
+    path separators and "..") is replaced by a hash, and a missing ID becomes
+    "anonymous".
+    """
+    if session_id is None:
+        return "anonymous"
+    session_id = str(session_id)
+    if SAFE_SESSION_ID.fullmatch(session_id):
+        return session_id
+    return "session-" + hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:32]
+
+
+class Workspace:
+    """
+    An isolated folder for the project and artifacts of one session.
+    """
+
+    def __init__(self, session_id: str, root: str):
+        self.session_id = session_id
+        self.root = root
+        self.project_dir = os.path.join(root, "generated")
+        self.last_used = time.time()
+        self.active_jobs = 0
+        os.makedirs(self.project_dir, exist_ok=True)
+
+    def touch(self):
+        self.last_used = time.time()
+
+
+class JobManager:
+    """
+    Runs pipeline steps for many sessions concurrently, each in its own workspace.
+
+    A global worker limit bounds how many jobs run at once across all sessions,
+    and a per-session limit queues further runs of the same user.
+    """
+
+    def __init__(self, root: str = WORKSPACES_DIR, workers: int = JOB_WORKERS,
+                 max_jobs_per_user: int = MAX_JOBS_PER_USER, idle_timeout: float = WORKSPACE_IDLE_TIMEOUT):
+        self.root = os.path.abspath(root)
+        self.workers = workers
+        self.max_jobs_per_user = max_jobs_per_user
+        self.idle_timeout = idle_timeout
+        self.workspaces = {}
+        self.jobs = {}
+        self._worker_slots = None
+        self._user_slots = {}
+
+    def workspace(self, session_id: str) -> Workspace:
+        """
+        Return the workspace of a session, creating it on first use.
+
+        Args:
+            session_id (str): The Gradio session hash, as sent by the client.
+
+        Returns:
+            Workspace: The session workspace.
+        """
+        session_id = safe_session_id(session_id)
+        workspace = self.workspaces.get(session_id)
+        if workspace is None:
+            self.collect_garbage()
+            root = os.path.abspath(os.path.join(self.root, session_id))
+            if os.path.dirname(root) != self.root:
+                raise ValueError(f"Invalid session id: {session_id!r}")
+            workspace = Workspace(session_id, root)
+            self.workspaces[session_id] = workspace
+        workspace.touch()
+        return workspace
+
+    def call(self, session_id: str, func, *args):
+        """
+        Run a quick synchronous function inside a session workspace, without queueing.
+
+        Args:
+            session_id (str): The Gradio session hash.
+            func: The function to call.
+
+        Returns:
+            The value returned by `func`.
+        """
+        token = current_workspace.set(self.workspace(session_id))
+        try:
+            return func(*args)
+        finally:
+            current_workspace.reset(token)
+
+    def _slots(self, session_id: str) -> tuple:
+        # Semaphores are created lazily so they bind to the running event loop
+        if self._worker_slots is None:
+            self._worker_slots = asyncio.Semaphore(self.workers)
+        if session_id not in self._user_slots:
+            self._user_slots[session_id] = asyncio.Semaphore(self.max_jobs_per_user)
+        return self._worker_slots, self._user_slots[session_id]
+
+    def _start(self, session_id: str, func) -> tuple:
+        workspace = self.workspace(session_id)
+        job_id = uuid.uuid4().hex[:12]
+        self.jobs[job_id] = {
+            "session": workspace.session_id, "step": getattr(func, "__name__", str(func)),
+            "status": "queued", "submitted": time.time(),
+        }
+        return workspace, job_id
+
+    def _finish(self, workspace: Workspace, job_id: str, status: str):
+        self.jobs[job_id].update(status=status, finished=time.time())
+        workspace.active_jobs -= 1
+        workspace.touch()
+
+    @staticmethod
+    def _spawn(workspace: Workspace, coro) -> asyncio.Task:
+        # Tasks copy the current context when created, so the job keeps its workspace
+        token = current_workspace.set(workspace)
+        try:
+            return asyncio.create_task(coro)
+        finally:
+            current_workspace.reset(token)
+
+    async def run(self, session_id: str, func, *args):
+        """
+        Queue a pipeline step and wait for its result.
+
+        Synchronous functions run in a worker thread; coroutines run on the event loop.
+
+        Args:
+            session_id (str): The Gradio session hash.
+            func: The step function.
+
+        Returns:
+            The value returned by `func`.
+        """
+        workspace, job_id = self._start(session_id, func)
+        worker_slots, user_slots = self._slots(workspace.session_id)
+        async with user_slots, worker_slots:
+            self.jobs[job_id].update(status="running", started=time.time())
+            workspace.active_jobs += 1
+            status = "failed"
+            task = None
+            try:
+                if inspect.iscoroutinefunction(func):
+                    task = self._spawn(workspace, func(*args))
+                else:
+                    task = self._spawn(workspace, asyncio.to_thread(func, *args))
+                result = await task
+                status = "done"
+                return result
+            finally:
+                if task is not None and not task.done():
+                    task.cancel()
+                self._finish(workspace, job_id, status)
+
+    async def stream(self, session_id: str, func, *args):
+        """
+        Queue a pipeline step implemented as an async generator and relay its updates.
+
+        Args:
+            session_id (str): The Gradio session hash.
+            func: The async generator function.
+
+        Yields:
+            The values yielded by `func`.
+        """
+        workspace, job_id = self._start(session_id, func)
+        worker_slots, user_slots = self._slots(workspace.session_id)
+        async with user_slots, worker_slots:
+            self.jobs[job_id].update(status="running", started=time.time())
+            workspace.active_jobs += 1
+            updates = asyncio.Queue()
+            finished = object()
+
+            async def produce():
+                async for update in func(*args):
+                    await updates.put(update)
+                await updates.put(finished)
+
+            task = self._spawn(workspace, produce())
+            status = "failed"
+            try:
+                while True:
+                    getter = asyncio.ensure_future(updates.get())
+                    await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                    if not getter.done():
+                        getter.cancel()
+                        # The producer has stopped; raise its exception, if any
+                        task.result()
+                        if updates.empty():
+                            break
+                        update = updates.get_nowait()
+                    else:
+                        update = getter.result()
+                    if update is finished:
+                        break
+                    yield update
+                status = "done"
+            finally:
+                task.cancel()
+                self._finish(workspace, job_id, status)
+
+    def collect_garbage(self):
+        """
+        Delete workspaces that have been idle longer than the idle timeout.
+
+        Returns:
+            int: The number of workspaces removed.
+        """
+        now = time.time()
+        removed = 0
+        for session_id, workspace in list(self.workspaces.items()):
+            if workspace.active_jobs or now - workspace.last_used < self.idle_timeout:
+                continue
+            if os.path.dirname(os.path.abspath(workspace.root)) == self.root:
+                shutil.rmtree(workspace.root, ignore_errors=True)
+            del self.workspaces[session_id]
+            self._user_slots.pop(session_id, None)
+            self.jobs = {job_id: job for job_id, job in self.jobs.items() if job["session"] != session_id}
+            removed += 1
+        return removed
@@ -0,0 +1,130 @@
+import re
+import ast
+import json
+
+FENCE_PATTERN = re.compile(r"```[a-zA-Z]*\s*\n?(.*?)(?:```|$)", re.DOTALL)
+TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+
+
+def loads_tolerant(text: str):
+    """
+    Parse JSON, accepting trailing commas and Python-style literals (single quotes,
+    True/False/None) that models often produce.
+
+    Args:
+        text (str): The JSON text.
+
+    Returns:
+        The parsed value.
+
+    Raises:
+        ValueError: If the text can't be parsed.
+    """
+    try:
+        return json.loads(text)
+    except ValueError as e:
+        error = e
+    try:
+        return json.loads(TRAILING_COMMA_PATTERN.sub(r"\1", text))
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        pass
+    raise ValueError(f"Invalid JSON: {error}")
+
+
+class JsonItemStream:
+    """
+    Incrementally scans streamed JSON and reports each completed object as soon as
+    its closing brace arrives.
+
+    The scanner tracks strings (double- or single-quoted) and nesting, so braces
+    inside strings are ignored. Objects that can't be parsed are skipped.
+    """
+
+    def __init__(self, required_keys=("path", "description")):
+        self.required_keys = required_keys
+        self.text = ""
+        self.items = []
+        self._position = 0
+        self._stack = []  # Start offsets of the open objects and arrays
+        self._quote = None
+        self._escaped = False
+
+    def feed(self, chunk: str) -> list:
+        """
+        Add streamed text.
+
+        Args:
+            chunk (str): The next piece of the response.
+
+        Returns:
+            list: The objects with all required keys completed by this chunk.
+        """
+        self.text += chunk
+        completed = []
+        text = self.text
+        for index in range(self._position, len(text)):
+            char = text[index]
+            if self._quote is not None:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == self._quote:
+                    self._quote = None
+                continue
+            if char in "\"'" and self._stack:
+                self._quote = char
+            elif char in "{[":
+                self._stack.append((char, index))
+            elif char in "}]" and self._stack:
+                opening, start = self._stack.pop()
+                if opening == "{" and char == "}":
+                    try:
+                        item = loads_tolerant(text[start:index + 1])
+                    except ValueError:
+                        continue
+                    if isinstance(item, dict) and all(key in item for key in self.required_keys):
+                        completed.append(item)
+        self._position = len(text)
+        self.items.extend(completed)
+        return completed
+
+
+def extract_json(text: str):
+    """
+    Find and parse the JSON value in a model response.
+
+    Accepts bare JSON, JSON inside a Markdown fence (with or without a language
+    tag) or surrounded by explanations, trailing commas and Python-style literals.
+
+    Args:
+        text (str): The model response.
+
+    Returns:
+        The parsed value.
+
+    Raises:
+        ValueError: If no JSON value can be parsed.
+    """
+    if not text or not text.strip():
+        raise ValueError("Empty output from LLM.")
+    candidates = [match.group(1) for match in FENCE_PATTERN.finditer(text)] + [text]
+    error = None
+    for candidate in candidates:
+        starts = [index for index in (candidate.find("["), candidate.find("{")) if index != -1]
+        if not starts:
+            continue
+        start = min(starts)
+        end = max(candidate.rfind("]"), candidate.rfind("}"))
+        if end <= start:
+            error = ValueError("The JSON value is incomplete.")
+            continue
+        try:
+            return loads_tolerant(candidate[start:end + 1])
+        except ValueError as e:
+            error = e
+    raise error or ValueError("No JSON value found.")
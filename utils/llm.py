@@ -0,0 +1,228 @@
+import os
+import sys
+import random
+import asyncio
+from utils.cache import ResponseCache, cache_key, cached_call, record_response
+from utils.metrics import annotate
+from utils.ratelimit import estimate_tokens, get_limiter, observe_response
+
+# Connection pool and retry settings shared by every LLM backend
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 20.0
+
+HF_INFERENCE_URL = "https://api-inference.huggingface.co/models/{model}"
+HF_INFERENCE_HOST = "api-inference.huggingface.co"
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+_http_client = None
+_http_client_loop = None
+_openai_clients = {}
+response_cache = ResponseCache()
+
+
+def get_http_client() -> "httpx.AsyncClient":
+    """
+    Return the process-wide HTTP client, creating it on first use.
+
+    The client keeps a pool of persistent keep-alive connections that every
+    backend shares, so requests don't pay a new TLS handshake each time. Every
+    response is reported to the rate limiter of its host.
+
+    Returns:
+        httpx.AsyncClient: The shared client.
+    """
+    import httpx  # Imported on first use to keep startup fast
+
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    # Connections are bound to the event loop that opened them
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        _http_client_loop = loop
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(LLM_TIMEOUT, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+            ),
+            event_hooks={"response": [observe_response]},
+        )
+    return _http_client
+
+
+def get_openai_client(api_key: str) -> "openai.AsyncOpenAI":
+    """
+    Return a cached async OpenAI client bound to the shared connection pool.
+
+    Args:
+        api_key (str): The OpenAI API key.
+
+    Returns:
+        AsyncOpenAI: The client. Retries are handled by `with_retries`.
+    """
+    from openai import AsyncOpenAI  # The SDK takes long to import; only load it when used
+
+    http_client = get_http_client()
+    cached = _openai_clients.get(api_key)
+    if cached is None or cached[1] is not http_client:
+        client = AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=0)
+        _openai_clients[api_key] = (client, http_client)
+    return _openai_clients[api_key][0]
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Decide whether a failed request is worth retrying.
+
+    Args:
+        error (Exception): The exception raised by the request.
+
+    Returns:
+        bool: True for timeouts, connection errors, rate limits and server errors.
+    """
+    # Errors of a library can only occur once it has been imported
+    httpx = sys.modules.get("httpx")
+    openai = sys.modules.get("openai")
+    if httpx is not None and isinstance(error, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    if openai is not None and isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if openai is not None and isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    if httpx is not None and isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+
+async def with_retries(call, retries: int = LLM_MAX_RETRIES):
+    """
+    Await `call()` and retry retryable failures with jittered exponential backoff.
+
+    Args:
+        call: Async callable without arguments performing one request.
+        retries (int): Number of retries after the first attempt.
+
+    Returns:
+        The value returned by `call()`.
+    """
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except Exception as e:
+            if attempt >= retries or not is_retryable(e):
+                raise
+            # Full jitter keeps concurrent retries from hitting the provider in lockstep
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+            attempt += 1
+            annotate("retries")
+            await asyncio.sleep(delay)
+
+
+async def openai_chat_stream(prompt: str, api_key: str, model: str = "gpt-4o", system: str = None,
+                             timeout: float = LLM_TIMEOUT, response_format: dict = None):
+    """
+    Stream a chat completion from OpenAI token by token.
+
+    A cached response is yielded in one piece. Opening the stream is retried like
+    any other request; once tokens have been yielded, failures are raised.
+
+    Args:
+        prompt (str): The user message.
+        api_key (str): The OpenAI API key.
+        model (str): The chat model to use.
+        system (str): Optional system message.
+        timeout (float): Per-request timeout in seconds.
+        response_format (dict): Optional structured output format, e.g. a JSON schema.
+
+    Yields:
+        str: Text deltas of the first choice.
+    """
+    messages = [{"role": "system", "content": system}] if system else []
+    messages.append({"role": "user", "content": prompt})
+    options = {"response_format": response_format} if response_format else {}
+    key = cache_key(model, options, f"{system or ''}\n{prompt}")
+    cached = response_cache.get(key)
+    if cached is not None:
+        annotate("cache_hits")
+        record_response(response_cache, key)
+        yield cached
+        return
+    if response_cache.enabled:
+        annotate("cache_misses")
+
+    tokens = estimate_tokens(f"{system or ''}{prompt}")
+    client = get_openai_client(api_key)
+    limiter = get_limiter(client.base_url.host)
+
+    async def call():
+        # Every attempt waits for the limiter; the slot is held until the stream ends
+        await limiter.acquire(tokens)
+        try:
+            return await get_openai_client(api_key).chat.completions.create(
+                model=model, messages=messages, timeout=timeout, stream=True, **options
+            )
+        except BaseException:
+            limiter.release()
+            raise
+
+    stream = await with_retries(call)
+    chunks = []
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                chunks.append(chunk.choices[0].delta.content)
+                yield chunk.choices[0].delta.content
+    finally:
+        limiter.release()
+    response_cache.set(key, "".join(chunks), model=model)
+    record_response(response_cache, key)
+
+
+async def hf_generate(prompt: str, api_key: str, model: str, parameters: dict = None,
+                      timeout: float = LLM_TIMEOUT) -> str:
+    """
+    Send a text-generation request to the Hugging Face Inference API.
+
+    Args:
+        prompt (str): The prompt text.
+        api_key (str): The Hugging Face API key.
+        model (str): The model repository id.
+        parameters (dict): Generation parameters.
+        timeout (float): Per-request timeout in seconds.
+
+    Returns:
+        str: The generated text.
+    """
+    headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+    payload = {"inputs": prompt, "parameters": parameters or {}}
+
+    tokens = estimate_tokens(prompt)
+
+    async def call():
+        async with get_limiter(HF_INFERENCE_HOST).slot(tokens):
+            response = await get_http_client().post(
+                HF_INFERENCE_URL.format(model=model), json=payload, headers=headers, timeout=timeout
+            )
+        response.raise_for_status()
+        data = response.json()
+        if isinstance(data, list):
+            data = data[0] if data else {}
+        return data.get("generated_text", "")
+
+    return await cached_call(response_cache, model, parameters or {}, prompt, lambda: with_retries(call))
+
+
+async def close_clients():
+    """
+    Close the shared HTTP connection pool.
+    """
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+    _openai_clients.clear()
@@ -0,0 +1,125 @@
+import os
+import json
+import time
+import queue
+import atexit
+import hashlib
+import logging
+import logging.handlers
+
+# Level of the console logs: DEBUG shows truncated prompts and generated code
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Characters of a prompt or generated file shown in a log line
+LOG_PAYLOAD_CHARS = int(os.getenv("LOG_PAYLOAD_CHARS", "200"))
+# Folder receiving the full prompts and completions as JSON lines; empty to disable
+LOG_ARTIFACTS_DIR = os.getenv("LOG_ARTIFACTS_DIR", "")
+LOG_ARTIFACTS_MAX_BYTES = int(os.getenv("LOG_ARTIFACTS_MAX_BYTES", str(50 * 1024 * 1024)))
+LOG_ARTIFACTS_BACKUPS = int(os.getenv("LOG_ARTIFACTS_BACKUPS", "5"))
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+NAMESPACE = "factory"
+
+_listener = None
+_artifacts = None
+
+
+class Payload:
+    """
+    A large text logged by size, hash and first characters.
+
+    The summary is only computed if the record is emitted, so disabled debug
+    lines cost nothing.
+    """
+
+    __slots__ = ("text", "limit")
+
+    def __init__(self, text: str, limit: int = LOG_PAYLOAD_CHARS):
+        self.text = text or ""
+        self.limit = limit
+
+    def __str__(self):
+        digest = hashlib.sha256(self.text.encode("utf-8", "replace")).hexdigest()[:12]
+        head = self.text[:self.limit]
+        more = "..." if len(self.text) > self.limit else ""
+        return f"<{len(self.text)} chars, sha256 {digest}> {head!r}{more}"
+
+
+def payload(text: str, limit: int = LOG_PAYLOAD_CHARS) -> Payload:
+    """
+    Wrap a prompt or generated file for logging: its size, hash and first `limit` characters.
+    """
+    return Payload(text, limit)
+
+
+def configure_logging(level: str = LOG_LEVEL, artifacts_dir: str = LOG_ARTIFACTS_DIR):
+    """
+    Set up the application loggers, once per process.
+
+    Records are put on a queue by the calling thread and written to stderr by a
+    background listener, so logging never blocks the event loop on terminal I/O.
+    With `artifacts_dir`, full payloads passed to `log_artifact` are written to
+    size-rotated JSON lines files there, through the same queue.
+    """
+    global _listener, _artifacts
+    if _listener is not None:
+        return
+    records = queue.SimpleQueue()
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+    handlers = [console]
+
+    root = logging.getLogger(NAMESPACE)
+    root.setLevel(level)
+    root.propagate = False
+    root.addHandler(logging.handlers.QueueHandler(records))
+
+    if artifacts_dir:
+        os.makedirs(artifacts_dir, exist_ok=True)
+        store = logging.handlers.RotatingFileHandler(
+            os.path.join(artifacts_dir, "artifacts.jsonl"), maxBytes=LOG_ARTIFACTS_MAX_BYTES,
+            backupCount=LOG_ARTIFACTS_BACKUPS, encoding="utf-8",
+        )
+        store.addFilter(lambda record: record.name == f"{NAMESPACE}.artifacts")
+        console.addFilter(lambda record: record.name != f"{NAMESPACE}.artifacts")
+        handlers.append(store)
+        _artifacts = logging.getLogger(f"{NAMESPACE}.artifacts")
+        _artifacts.setLevel(logging.DEBUG)
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)  # Flush the queued records on exit
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Return the logger of a module, configuring logging on first use.
+
+    Args:
+        name (str): The module name, usually `__name__`.
+
+    Returns:
+        logging.Logger: A logger under the application namespace.
+    """
+    configure_logging()
+    return logging.getLogger(f"{NAMESPACE}.{name}")
+
+
+def log_artifact(kind: str, path: str, text: str, **fields):
+    """
+    Record a full payload, e.g. a prompt or a completion, in the artifact store.
+
+    Does nothing unless LOG_ARTIFACTS_DIR is set.
+
+    Args:
+        kind (str): What the payload is, e.g. "prompt" or "completion".
+        path (str): The file the payload belongs to.
+        text (str): The payload.
+        **fields: Extra JSON-serializable fields.
+    """
+    if _artifacts is None:
+        return
+    record = {
+        "time": time.time(), "kind": kind, "path": path,
+        "sha256": hashlib.sha256(text.encode("utf-8", "replace")).hexdigest(), "text": text, **fields,
+    }
+    _artifacts.info(json.dumps(record, ensure_ascii=False))
@@ -0,0 +1,106 @@
+import os
+import json
+import hashlib
+
+
+def content_hash(content: str) -> str:
+    """
+    Hash a text with SHA-256.
+
+    Args:
+        content (str): The text to hash.
+
+    Returns:
+        str: The hex digest.
+    """
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def input_hash(prompt_template: str, settings: dict, dependency_hashes: dict) -> str:
+    """
+    Hash everything that determines the output of a generated file.
+
+    Args:
+        prompt_template (str): The prompt without dependency code. It contains the
+            file path, its description and the template wording.
+        settings (dict): Model and prompt-building settings.
+        dependency_hashes (dict): Maps each dependency path to its content hash.
+
+    Returns:
+        str: The hex digest of the inputs.
+    """
+    payload = json.dumps(
+        {"prompt": prompt_template, "settings": settings, "dependencies": dependency_hashes},
+        sort_keys=True,
+    )
+    return content_hash(payload)
+
+
+class BuildManifest:
+    """
+    Records, for each generated file, the hash of its inputs and of its content.
+
+    A file whose recorded inputs match and whose content on disk is unchanged can
+    be reused instead of regenerated.
+    """
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self.files = {}
+        self.load()
+
+    def load(self):
+        """
+        Load the manifest from disk, starting empty if it is missing or unreadable.
+        """
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as file:
+                self.files = json.load(file).get("files", {})
+        except (OSError, ValueError):
+            self.files = {}
+
+    def save(self):
+        """
+        Write the manifest atomically.
+        """
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({"files": self.files}, file, indent=2, sort_keys=True)
+        os.replace(temp_path, self.manifest_path)
+
+    def is_fresh(self, key: str, inputs: str, content: str) -> bool:
+        """
+        Check whether a file can be reused.
+
+        Args:
+            key (str): The manifest key of the file.
+            inputs (str): The current input hash.
+            content (str): The current content on disk, or None if missing.
+
+        Returns:
+            bool: True if the inputs are unchanged and the file wasn't modified.
+        """
+        entry = self.files.get(key)
+        return (
+            entry is not None
+            and content is not None
+            and entry.get("inputs") == inputs
+            and entry.get("content") == content_hash(content)
+        )
+
+    def record(self, key: str, inputs: str, content: str):
+        """
+        Record the inputs and content of a freshly generated file.
+        """
+        self.files[key] = {"inputs": inputs, "content": content_hash(content)}
+
+    def prune(self, keys):
+        """
+        Forget files that are no longer part of the project tree.
+
+        Args:
+            keys: The manifest keys to keep.
+        """
+        keys = set(keys)
+        self.files = {key: entry for key, entry in self.files.items() if key in keys}
@@ -0,0 +1,193 @@
+import os
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Number of finished spans kept in memory for the Performance tab
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "5000"))
+# Port of the Prometheus text endpoint; 0 disables it
+METRICS_PORT = int(os.getenv("METRICS_PORT") or "0")
+# The endpoint has no authentication, so it only listens locally unless a host is configured
+METRICS_HOST = os.getenv("METRICS_HOST") or "127.0.0.1"
+
+DURATION_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    A timed operation with numeric and string attributes.
+    """
+
+    __slots__ = ("name", "attributes", "session", "start", "end", "_perf_start", "_perf_end")
+
+    def __init__(self, name: str, attributes: dict, session: str):
+        self.name = name
+        self.attributes = attributes
+        self.session = session
+        self.start = time.time()
+        self.end = None
+        self._perf_start = time.perf_counter()
+        self._perf_end = None
+
+    @property
+    def duration(self) -> float:
+        end = self._perf_end if self._perf_end is not None else time.perf_counter()
+        return end - self._perf_start
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, key: str, value=1):
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def finish(self):
+        self._perf_end = time.perf_counter()
+        self.end = self.start + self.duration
+
+
+class MetricsRegistry:
+    """
+    Keeps recent spans and aggregates them into Prometheus-style metrics.
+    """
+
+    def __init__(self, max_spans: int = TRACE_MAX_SPANS):
+        self.spans = deque(maxlen=max_spans)
+        self.aggregates = {}
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def record(self, span: Span):
+        with self.lock:
+            self.spans.append(span)
+            aggregate = self.aggregates.setdefault(
+                span.name, {"count": 0, "seconds": 0.0, "buckets": [0] * len(DURATION_BUCKETS), "totals": {}}
+            )
+            aggregate["count"] += 1
+            aggregate["seconds"] += span.duration
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if span.duration <= bound:
+                    aggregate["buckets"][index] += 1
+            for key, value in span.attributes.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    aggregate["totals"][key] = aggregate["totals"].get(key, 0) + value
+
+    def add_collector(self, collector):
+        """
+        Register a callable returning extra Prometheus text lines on each scrape.
+        """
+        self.collectors.append(collector)
+
+    def recent_spans(self, session: str = None) -> list:
+        """
+        Return the recorded spans, optionally only those of one session.
+        """
+        with self.lock:
+            return [span for span in self.spans if session is None or span.session == session]
+
+    def render_prometheus(self) -> str:
+        """
+        Render the aggregated metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP factory_span_duration_seconds Duration of instrumented pipeline operations.",
+            "# TYPE factory_span_duration_seconds histogram",
+        ]
+        with self.lock:
+            aggregates = {name: dict(aggregate) for name, aggregate in self.aggregates.items()}
+        for name, aggregate in sorted(aggregates.items()):
+            for bound, count in zip(DURATION_BUCKETS, aggregate["buckets"]):
+                lines.append(f'factory_span_duration_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+            lines.append(f'factory_span_duration_seconds_bucket{{span="{name}",le="+Inf"}} {aggregate["count"]}')
+            lines.append(f'factory_span_duration_seconds_sum{{span="{name}"}} {aggregate["seconds"]:.6f}')
+            lines.append(f'factory_span_duration_seconds_count{{span="{name}"}} {aggregate["count"]}')
+        for name, aggregate in sorted(aggregates.items()):
+            for key, value in sorted(aggregate["totals"].items()):
+                lines.append(f'factory_span_{key}_total{{span="{name}"}} {value}')
+        for collector in self.collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def span(name: str, session: str = None, **attributes):
+    """
+    Time a block of code and record it as a span.
+
+    Child spans inherit the session of the enclosing span.
+
+    Args:
+        name (str): The operation name.
+        session (str): The session the operation belongs to.
+        **attributes: Initial attributes, e.g. the file path.
+
+    Yields:
+        Span: The span, so attributes can be added while it runs.
+    """
+    parent = _current_span.get()
+    if session is None and parent is not None:
+        session = parent.session
+    current = Span(name, attributes, session)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException:
+        current.add("errors")
+        raise
+    finally:
+        current.finish()
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Async generators may finish in a different context than they started in
+            pass
+        registry.record(current)
+
+
+def annotate(key: str, value=1):
+    """
+    Add a value to an attribute of the span running in the current context, if any.
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.add(key, value)
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST):
+    """
+    Serve the Prometheus text endpoint at /metrics in a background thread.
+
+    Args:
+        port (int): The port to listen on.
+        host (str): The address to bind; 127.0.0.1 by default.
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,147 @@
+import os
+import re
+import ast
+import json
+
+SEARCH_REPLACE_BLOCK = re.compile(
+    r"^<{5,9} SEARCH[^\n]*\n(.*?)^={5,9}[ \t]*\n(.*?)^>{5,9} REPLACE[^\n]*$",
+    re.DOTALL | re.MULTILINE,
+)
+HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+\d+(?:,\d+)? @@")
+NO_CHANGES = "NO_CHANGES"
+
+
+class PatchError(ValueError):
+    """
+    Raised when an edit cannot be applied to the current file content.
+    """
+
+
+def parse_search_replace(response: str) -> list:
+    """
+    Parse SEARCH/REPLACE edit blocks from an LLM response.
+
+    Args:
+        response (str): The raw LLM output.
+
+    Returns:
+        list: (search, replace) tuples in the order they appear.
+    """
+    return [(search, replace) for search, replace in SEARCH_REPLACE_BLOCK.findall(response)]
+
+
+def _replace_once(content: str, search: str, replace: str) -> str:
+    """
+    Replace the first occurrence of `search`, tolerating trailing whitespace differences.
+    """
+    if search in content:
+        return content.replace(search, replace, 1)
+
+    # Fall back to a line-by-line match ignoring trailing whitespace
+    lines = content.splitlines(keepends=True)
+    search_lines = [line.rstrip() for line in search.splitlines()]
+    if not search_lines:
+        raise PatchError("Empty SEARCH block.")
+    for start in range(len(lines) - len(search_lines) + 1):
+        if all(lines[start + offset].rstrip() == line for offset, line in enumerate(search_lines)):
+            end = start + len(search_lines)
+            trailing = "\n" if replace and not replace.endswith("\n") and end < len(lines) else ""
+            return "".join(lines[:start]) + replace + trailing + "".join(lines[end:])
+    raise PatchError(f"SEARCH block not found in file: {search_lines[0][:80]!r}")
+
+
+def apply_search_replace(content: str, edits: list) -> str:
+    """
+    Apply SEARCH/REPLACE edits in order.
+
+    Args:
+        content (str): The current file content.
+        edits (list): (search, replace) tuples from `parse_search_replace`.
+
+    Returns:
+        str: The updated content.
+    """
+    for search, replace in edits:
+        if not search.strip():
+            # An empty SEARCH appends to the file
+            content = content.rstrip("\n") + "\n" + replace
+            continue
+        content = _replace_once(content, search, replace)
+    return content
+
+
+def apply_unified_diff(content: str, diff: str) -> str:
+    """
+    Apply a unified diff, locating each hunk by its context rather than line numbers.
+
+    Args:
+        content (str): The current file content.
+        diff (str): The unified diff text.
+
+    Returns:
+        str: The updated content.
+    """
+    hunks, current = [], None
+    for line in diff.splitlines():
+        if HUNK_HEADER.match(line):
+            current = ([], [])
+            hunks.append(current)
+        elif current is None or line.startswith(("---", "+++")):
+            continue
+        elif line.startswith("+"):
+            current[1].append(line[1:])
+        elif line.startswith("-"):
+            current[0].append(line[1:])
+        elif line.startswith(" ") or line == "":
+            current[0].append(line[1:])
+            current[1].append(line[1:])
+    if not hunks:
+        raise PatchError("No hunks found in diff.")
+
+    for old, new in hunks:
+        search = "\n".join(old) + ("\n" if old else "")
+        replace = "\n".join(new) + ("\n" if new else "")
+        content = apply_search_replace(content, [(search, replace)])
+    return content
+
+
+def apply_patch(content: str, response: str):
+    """
+    Apply the edits contained in an LLM response.
+
+    Args:
+        content (str): The current file content.
+        response (str): The raw LLM output with SEARCH/REPLACE blocks or a unified diff.
+
+    Returns:
+        str: The updated content, or None if the response contains no edits.
+    """
+    edits = parse_search_replace(response)
+    if edits:
+        return apply_search_replace(content, edits)
+    if re.search(HUNK_HEADER.pattern, response, re.MULTILINE):
+        diff = re.sub(r"^```\w*\n|^```\s*$", "", response, flags=re.MULTILINE)
+        return apply_unified_diff(content, diff)
+    return None
+
+
+def validate_content(path: str, content: str):
+    """
+    Run a cheap syntax check on patched content.
+
+    Args:
+        path (str): The file path, used to pick the check.
+        content (str): The content to check.
+
+    Returns:
+        str: A description of the problem, or None if the content looks valid.
+    """
+    _, extension = os.path.splitext(path.lower())
+    try:
+        if extension == ".py":
+            ast.parse(content)
+        elif extension == ".json":
+            json.loads(content)
+    except (SyntaxError, ValueError) as e:
+        return f"{type(e).__name__}: {e}"
+    return None
@@ -0,0 +1,234 @@
+import os
+import time
+import asyncio
+from collections import deque
+from utils.llm import openai_chat_stream, hf_generate
+from utils.logger import get_logger
+
+# Percentile of the primary's first-token latency after which a hedge request is sent
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "0.95"))
+# Hedge delay used until enough latency samples have been collected
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "8.0"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "1.0"))
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 500
+
+logger = get_logger(__name__)
+
+
+class LatencyHistogram:
+    """
+    Rolling window of request latencies and error counts for one backend.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.first_token = deque(maxlen=window)
+        self.total = deque(maxlen=window)
+        self.errors = 0
+        self.requests = 0
+
+    def record(self, first_token: float):
+        self.first_token.append(first_token)
+
+    def record_total(self, total: float):
+        self.total.append(total)
+
+    def percentile(self, q: float, samples=None):
+        """
+        Return the q-quantile (0..1) of the recorded first-token latencies.
+
+        Returns:
+            float: The latency in seconds, or None without samples.
+        """
+        values = sorted(self.first_token if samples is None else samples)
+        if not values:
+            return None
+        return values[min(len(values) - 1, int(q * len(values)))]
+
+    def summary(self) -> dict:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "samples": len(self.first_token),
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "total_p50": self.percentile(0.5, self.total),
+            "total_p99": self.percentile(0.99, self.total),
+        }
+
+
+class Provider:
+    """
+    A text generation backend. Subclasses implement `stream`.
+    """
+
+    name = "provider"
+
+    async def stream(self, prompt: str, system: str = None, response_format: dict = None):
+        """
+        Generate a response to the prompt.
+
+        `response_format` requests structured output (e.g. a JSON schema) from
+        backends that support it; others rely on the prompt alone.
+
+        Yields:
+            str: Text chunks as they are produced.
+        """
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+    async def complete(self, prompt: str, system: str = None, response_format: dict = None) -> str:
+        return "".join([chunk async for chunk in self.stream(prompt, system, response_format)])
+
+
+class OpenAIProvider(Provider):
+    """
+    OpenAI chat completions with token streaming.
+    """
+
+    def __init__(self, api_key: str, model: str = "gpt-4o"):
+        self.api_key = api_key
+        self.model = model
+        self.name = f"openai:{model}"
+
+    async def stream(self, prompt: str, system: str = None, response_format: dict = None):
+        async for chunk in openai_chat_stream(prompt, api_key=self.api_key, model=self.model, system=system,
+                                              response_format=response_format):
+            yield chunk
+
+
+class HuggingFaceProvider(Provider):
+    """
+    Hugging Face Inference API text generation; the response arrives in one chunk.
+    """
+
+    def __init__(self, api_key: str, model: str, parameters: dict = None):
+        self.api_key = api_key
+        self.model = model
+        self.parameters = parameters or {}
+        self.name = f"huggingface:{model}"
+
+    async def stream(self, prompt: str, system: str = None, response_format: dict = None):
+        # The Inference API has no structured output mode; the prompt describes the format
+        text = f"{system}\n\n{prompt}" if system else prompt
+        yield await hf_generate(text, api_key=self.api_key, model=self.model, parameters=self.parameters)
+
+
+class HedgedRouter:
+    """
+    Routes requests to a primary backend, hedging and failing over to a secondary.
+
+    If the primary hasn't produced its first token within the configured percentile
+    of its recent first-token latencies, the same request is sent to the secondary.
+    Whichever backend produces a token first wins and the other request is cancelled.
+    Errors before the first token fail over to the other backend. Cancelled and
+    failed attempts are recorded as censored samples (the time they waited, at
+    least the hedge delay), so losing hedges don't bias the percentile downwards.
+    """
+
+    def __init__(self, primary: Provider, secondary: Provider = None, percentile: float = HEDGE_PERCENTILE):
+        self.primary = primary
+        self.secondary = secondary
+        self.percentile = percentile
+        self.histograms = {provider.name: LatencyHistogram() for provider in (primary, secondary) if provider}
+
+    def hedge_delay(self) -> float:
+        """
+        Return how long to wait for the primary's first token before hedging.
+        """
+        histogram = self.histograms[self.primary.name]
+        if len(histogram.first_token) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(HEDGE_MIN_DELAY, histogram.percentile(self.percentile))
+
+    def latency_summary(self) -> dict:
+        """
+        Return the latency statistics of every backend, keyed by provider name.
+        """
+        return {name: histogram.summary() for name, histogram in self.histograms.items()}
+
+    async def stream(self, prompt: str, system: str = None, response_format: dict = None):
+        """
+        Generate a response, hedging and failing over between backends.
+
+        Yields:
+            str: Text chunks from the winning backend.
+        """
+        events = asyncio.Queue()
+        tasks, started, failed = {}, {}, {}
+        winner = None
+
+        async def pump(provider):
+            try:
+                async for chunk in provider.stream(prompt, system, response_format):
+                    await events.put(("chunk", provider, chunk))
+                await events.put(("end", provider, None))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await events.put(("error", provider, e))
+
+        def launch(provider):
+            started[provider] = time.monotonic()
+            self.histograms[provider.name].requests += 1
+            tasks[provider] = asyncio.create_task(pump(provider))
+
+        def censor(provider, waited_only=False):
+            # A request without a first token took at least this long; recording the
+            # lower bound keeps slow attempts in the percentile behind the hedge delay,
+            # which would otherwise only see the fast winners. Errors are counted on
+            # their own, so one only counts as a sample once it outlasted the delay
+            elapsed = time.monotonic() - started[provider]
+            if not waited_only or elapsed >= delay:
+                self.histograms[provider.name].record(elapsed)
+
+        launch(self.primary)
+        delay = self.hedge_delay()
+        try:
+            while True:
+                timeout = None
+                if winner is None and self.secondary is not None and self.secondary not in tasks:
+                    timeout = max(0.0, started[self.primary] + delay - time.monotonic())
+                try:
+                    kind, provider, value = await asyncio.wait_for(events.get(), timeout)
+                except asyncio.TimeoutError:
+                    logger.info("Hedging: no first token from %s after %.1fs, sending a duplicate request to %s",
+                                self.primary.name, delay, self.secondary.name)
+                    launch(self.secondary)
+                    continue
+
+                if winner is not None and provider is not winner:
+                    continue
+                if kind == "error":
+                    self.histograms[provider.name].errors += 1
+                    failed[provider] = value
+                    if winner is None:
+                        censor(provider, waited_only=True)
+                        if self.secondary is not None and self.secondary not in tasks:
+                            logger.warning("Failing over from %s to %s: %s", provider.name, self.secondary.name, value)
+                            launch(self.secondary)
+                            continue
+                        if len(failed) < len(tasks):
+                            continue  # The other backend is still running
+                    raise value
+
+                if winner is None:
+                    # First token wins; cancel the other request
+                    winner = provider
+                    self.histograms[provider.name].record(time.monotonic() - started[provider])
+                    for other, task in tasks.items():
+                        if other is not provider:
+                            if other not in failed:
+                                censor(other)
+                            task.cancel()
+                if kind == "end":
+                    self.histograms[provider.name].record_total(time.monotonic() - started[provider])
+                    return
+                yield value
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    async def complete(self, prompt: str, system: str = None, response_format: dict = None) -> str:
+        return "".join([chunk async for chunk in self.stream(prompt, system, response_format)])
@@ -0,0 +1,274 @@
+import os
+import re
+import time
+import heapq
+import asyncio
+import itertools
+import contextvars
+from collections import deque
+from contextlib import asynccontextmanager
+from utils.metrics import annotate
+from utils.logger import get_logger
+
+# Requests in flight per API host: the starting point and the bounds of the adaptive limit
+RATE_INITIAL_CONCURRENCY = float(os.getenv("RATE_INITIAL_CONCURRENCY", "4"))
+RATE_MIN_CONCURRENCY = float(os.getenv("RATE_MIN_CONCURRENCY", "1"))
+RATE_MAX_CONCURRENCY = float(os.getenv("RATE_MAX_CONCURRENCY", "32"))
+# Tokens per minute allowed by the API tier; 0 until the provider reports it in its headers
+RATE_TOKENS_PER_MINUTE = int(os.getenv("RATE_TOKENS_PER_MINUTE", "0"))
+# Completion tokens assumed for a request when reserving its share of the token budget
+RATE_COMPLETION_TOKENS = int(os.getenv("RATE_COMPLETION_TOKENS", "1024"))
+DECREASE_FACTOR = 0.5
+DEFAULT_RETRY_AFTER = 1.0
+TOKEN_WINDOW = 60.0
+OVERLOAD_STATUS_CODES = {429, 503}
+
+# Interactive UI requests go before batch work when both wait for the same host
+INTERACTIVE, BATCH = 0, 1
+request_priority = contextvars.ContextVar("request_priority", default=INTERACTIVE)
+
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+logger = get_logger(__name__)
+_limiters = {}
+_sequence = itertools.count()
+
+
+def parse_duration(value: str):
+    """
+    Parse a rate-limit reset duration such as "20ms", "1.5s" or "6m0s", or a number of seconds.
+
+    Returns:
+        float: The duration in seconds, or None if it can't be parsed.
+    """
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_PART.findall(value)
+    if not parts:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def estimate_tokens(prompt: str) -> int:
+    """
+    Estimate the tokens a request counts against the budget: about four
+    characters per prompt token plus the expected completion.
+    """
+    return len(prompt) // 4 + RATE_COMPLETION_TOKENS
+
+
+class AdaptiveLimiter:
+    """
+    Adaptive concurrency and token budget for the requests sent to one API host.
+
+    Limits follow AIMD: every successful response raises the concurrency limit by
+    1/limit (about one more request per round of responses) and the tokens per
+    minute budget by a twentieth of its ceiling, while a 429 or 503 halves both
+    (once per round of in-flight requests) and pauses the host for its
+    Retry-After. The provider's x-ratelimit-* headers cap the budget and hold
+    requests until the reported window resets.
+
+    Waiting requests start in priority order (interactive before batch), then
+    in arrival order.
+    """
+
+    def __init__(self, name: str, initial: float = RATE_INITIAL_CONCURRENCY,
+                 minimum: float = RATE_MIN_CONCURRENCY, maximum: float = RATE_MAX_CONCURRENCY,
+                 tokens_per_minute: int = RATE_TOKENS_PER_MINUTE):
+        self.name = name
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.token_ceiling = tokens_per_minute or None
+        self.token_budget = self.token_ceiling
+        self.in_flight = 0
+        self.paused_until = 0.0
+        # Responses still expected from requests sent before the last decrease
+        self._recovering = 0
+        self.remaining_requests = None
+        self.requests_reset = 0.0
+        self.remaining_tokens = None
+        self.tokens_reset = 0.0
+        self.stats = {"requests": 0, "throttled": 0, "waited_seconds": 0.0}
+        self._spent = deque()  # (start time, tokens) of the requests of the last minute
+        self._waiters = []  # Heap of [priority, sequence, future]
+
+    def _delay(self, tokens: int):
+        """
+        Return how long a request must wait before it may start: 0 to start now,
+        None to wait for a running request to finish.
+        """
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.in_flight >= max(1, int(self.limit)):
+            return None
+        if self.remaining_requests is not None and self.remaining_requests <= 0 and now < self.requests_reset:
+            return self.requests_reset - now
+        if self.remaining_tokens is not None and tokens > self.remaining_tokens and now < self.tokens_reset:
+            return self.tokens_reset - now
+        while self._spent and now - self._spent[0][0] >= TOKEN_WINDOW:
+            self._spent.popleft()
+        spent = sum(count for _, count in self._spent)
+        # A single request larger than the budget still goes through on its own
+        if self.token_budget and spent and spent + tokens > self.token_budget:
+            return self._spent[0][0] + TOKEN_WINDOW - now
+        return 0
+
+    def _wake(self):
+        # Only the first waiter may start; it wakes the next one once it has
+        if self._waiters and not self._waiters[0][2].done():
+            self._waiters[0][2].set_result(None)
+
+    async def acquire(self, tokens: int = 0, priority: int = None):
+        """
+        Wait for a free slot and enough token budget, then count the request as in flight.
+
+        Args:
+            tokens (int): Estimated tokens of the request.
+            priority (int): INTERACTIVE or BATCH; defaults to `request_priority`.
+        """
+        loop = asyncio.get_running_loop()
+        priority = request_priority.get() if priority is None else priority
+        entry = [priority, next(_sequence), loop.create_future()]
+        heapq.heappush(self._waiters, entry)
+        start = time.monotonic()
+        try:
+            while True:
+                delay = self._delay(tokens) if self._waiters[0] is entry else None
+                if delay == 0:
+                    break
+                if entry[2].done():
+                    entry[2] = loop.create_future()
+                try:
+                    await asyncio.wait_for(asyncio.shield(entry[2]), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+            self._wake()
+
+        waited = time.monotonic() - start
+        self.in_flight += 1
+        self.stats["requests"] += 1
+        self.stats["waited_seconds"] += waited
+        if waited > 0.001:
+            annotate("rate_limit_wait_seconds", round(waited, 3))
+        self._spent.append((time.monotonic(), tokens))
+        if self.remaining_tokens is not None:
+            self.remaining_tokens -= tokens
+        if self.remaining_requests is not None:
+            self.remaining_requests -= 1
+
+    def release(self):
+        """
+        Mark a request started with `acquire` as finished.
+        """
+        self.in_flight = max(0, self.in_flight - 1)
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0, priority: int = None):
+        """
+        Hold a slot for the duration of the block.
+        """
+        await self.acquire(tokens, priority)
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def observe(self, status_code: int, headers):
+        """
+        Adjust the limits from the status code and rate-limit headers of a response.
+
+        Args:
+            status_code (int): The HTTP status code.
+            headers: The response headers (a case-insensitive mapping).
+        """
+        now = time.monotonic()
+        self._recovering -= 1
+        limit_tokens = headers.get("x-ratelimit-limit-tokens")
+        if limit_tokens and limit_tokens.isdigit():
+            self.token_ceiling = int(limit_tokens)
+            if self.token_budget is None or self.token_budget > self.token_ceiling:
+                self.token_budget = self.token_ceiling
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        if remaining and remaining.isdigit():
+            self.remaining_requests = int(remaining)
+            self.requests_reset = now + (parse_duration(headers.get("x-ratelimit-reset-requests")) or 0)
+        remaining = headers.get("x-ratelimit-remaining-tokens")
+        if remaining and remaining.isdigit():
+            self.remaining_tokens = int(remaining)
+            self.tokens_reset = now + (parse_duration(headers.get("x-ratelimit-reset-tokens")) or 0)
+
+        if status_code in OVERLOAD_STATUS_CODES:
+            self.stats["throttled"] += 1
+            annotate("rate_limited")
+            retry_after = parse_duration(headers.get("retry-after-ms"))
+            retry_after = retry_after / 1000 if retry_after is not None else parse_duration(headers.get("retry-after"))
+            self.paused_until = max(self.paused_until, now + (retry_after or DEFAULT_RETRY_AFTER))
+            # Requests already in flight when the limits were cut don't cut them again,
+            # so a burst of 429s counts as one signal
+            if self._recovering <= 0:
+                self._recovering = self.in_flight
+                self.limit = max(self.minimum, self.limit * DECREASE_FACTOR)
+                if self.token_ceiling:
+                    self.token_budget = max(self.token_ceiling * 0.05, self.token_budget * DECREASE_FACTOR)
+                logger.warning("Rate limited by %s: %.1f requests in flight, %s tokens per minute",
+                               self.name, self.limit, self.token_budget or "unlimited")
+        elif status_code < 400:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            if self.token_ceiling:
+                self.token_budget = min(self.token_ceiling, self.token_budget + self.token_ceiling / 20)
+        self._wake()
+
+    def summary(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "token_budget": self.token_budget,
+            **self.stats,
+        }
+
+
+def get_limiter(host: str) -> AdaptiveLimiter:
+    """
+    Return the process-wide limiter of an API host, creating it on first use.
+
+    Every session and job sending requests to the host shares it.
+    """
+    limiter = _limiters.get(host)
+    if limiter is None:
+        limiter = _limiters[host] = AdaptiveLimiter(host)
+    return limiter
+
+
+async def observe_response(response):
+    """
+    httpx response hook feeding the status and headers of every response to its host's limiter.
+    """
+    get_limiter(response.request.url.host).observe(response.status_code, response.headers)
+
+
+def limiter_metrics() -> list:
+    """
+    Export the state of every limiter as Prometheus gauge lines.
+    """
+    lines = ["# TYPE factory_rate_limit_concurrency gauge"]
+    for host, limiter in sorted(_limiters.items()):
+        summary = limiter.summary()
+        lines.append(f'factory_rate_limit_concurrency{{host="{host}"}} {summary["limit"]}')
+        lines.append(f'factory_rate_limit_in_flight{{host="{host}"}} {summary["in_flight"]}')
+        lines.append(f'factory_rate_limit_waiting{{host="{host}"}} {summary["waiting"]}')
+        if summary["token_budget"]:
+            lines.append(f'factory_rate_limit_tokens_per_minute{{host="{host}"}} {summary["token_budget"]:.0f}')
+        lines.append(f'factory_rate_limit_throttled_total{{host="{host}"}} {summary["throttled"]}')
+    return lines
@@ -0,0 +1,197 @@
+import os
+import re
+import asyncio
+
+# File names that usually wire the rest of the project together
+ENTRY_POINT_NAMES = {
+    "main.py", "app.py", "__main__.py", "manage.py", "wsgi.py", "asgi.py", "server.py",
+    "index.js", "main.js", "app.js", "server.js", "index.html",
+    "dockerfile", "docker-compose.yml", "docker-compose.yaml",
+}
+# Documentation is written last so it can describe every other file
+DOC_EXTENSIONS = {".md", ".rst"}
+# Small configuration and packaging files that can be generated several per request
+BOILERPLATE_NAMES = {
+    "__init__.py", "requirements.txt", "requirements-dev.txt", ".gitignore", ".dockerignore", ".env",
+    ".env.example", ".env_template", ".editorconfig", ".flake8", ".prettierrc", ".eslintrc", ".babelrc",
+    ".nvmrc", "license", "license.txt", "manifest.in", "procfile", "runtime.txt",
+}
+BOILERPLATE_EXTENSIONS = {".cfg", ".ini", ".toml", ".txt", ".yml", ".yaml", ".json"}
+BOILERPLATE_MAX_DESCRIPTION = 200
+
+
+def file_tier(path: str) -> int:
+    """
+    Classify a file into a generation tier.
+
+    Args:
+        path (str): The file path from the project tree.
+
+    Returns:
+        int: 0 for leaf modules, 1 for entry points, 2 for documentation.
+    """
+    name = os.path.basename(path).lower()
+    _, extension = os.path.splitext(name)
+    if extension in DOC_EXTENSIONS or name.startswith("readme"):
+        return 2
+    if name in ENTRY_POINT_NAMES:
+        return 1
+    return 0
+
+
+def is_boilerplate(path: str, description: str) -> bool:
+    """
+    Check whether a tree entry is a small, low-complexity file.
+
+    Args:
+        path (str): The file path from the project tree.
+        description (str): The purpose of the file.
+
+    Returns:
+        bool: True for configuration and packaging files with a short description.
+    """
+    name = os.path.basename(path).lower()
+    _, extension = os.path.splitext(name)
+    if not name or file_tier(path) != 0 or len(description or "") > BOILERPLATE_MAX_DESCRIPTION:
+        return False
+    return name in BOILERPLATE_NAMES or extension in BOILERPLATE_EXTENSIONS
+
+
+def mention_patterns(path: str) -> list:
+    """
+    Build the regex patterns that identify a reference to the given file in free text.
+    """
+    normalized = path.replace("\\", "/").lstrip("./")
+    # Tree paths are prefixed with the output folder, which descriptions never mention
+    if normalized.startswith("generated/"):
+        normalized = normalized[len("generated/"):]
+    name = os.path.basename(normalized)
+    patterns = [re.escape(normalized), re.escape(name)]
+    stem, extension = os.path.splitext(normalized)
+    if extension == ".py":
+        # Dotted module path, e.g. "src.utils.logging" for "src/utils/logging.py"
+        patterns.append(re.escape(stem.replace("/", ".")))
+    return [re.compile(rf"(?<![\w./-]){pattern}(?![\w-])") for pattern in patterns if pattern]
+
+
+def _reaches(graph: dict, start: int, target: int) -> bool:
+    """
+    Check whether `target` is reachable from `start` following dependency edges.
+    """
+    stack, seen = [start], set()
+    while stack:
+        node = stack.pop()
+        if node == target:
+            return True
+        if node in seen:
+            continue
+        seen.add(node)
+        stack.extend(graph[node])
+    return False
+
+
+def build_dependency_graph(entries: list) -> dict:
+    """
+    Build a dependency DAG over the project tree.
+
+    Leaf modules come first, entry points depend on every leaf module and documentation
+    depends on everything else. Within a tier, a file depends on the files its description
+    mentions. Repeated paths depend on their previous occurrence so updates stay ordered.
+
+    Args:
+        entries (list): A list of (path, description) tuples in tree order.
+
+    Returns:
+        dict: Maps each entry index to the set of entry indices it depends on.
+    """
+    graph = {index: set() for index in range(len(entries))}
+    tiers = [file_tier(path) for path, _ in entries]
+    patterns = [mention_patterns(path) for path, _ in entries]
+    last_seen = {}
+
+    for index, (path, description) in enumerate(entries):
+        if path in last_seen:
+            graph[index].add(last_seen[path])
+        last_seen[path] = index
+
+        for other, (other_path, _) in enumerate(entries):
+            if other == index or other_path == path:
+                continue
+            if tiers[other] < tiers[index]:
+                graph[index].add(other)
+            elif tiers[other] == tiers[index] and any(p.search(description or "") for p in patterns[other]):
+                # Skip mentions that would close a cycle
+                if not _reaches(graph, other, index):
+                    graph[index].add(other)
+
+    return graph
+
+
+def transitive_dependencies(graph: dict, node: int) -> list:
+    """
+    Collect every node the given node depends on, directly or indirectly.
+
+    Args:
+        graph (dict): The dependency graph from `build_dependency_graph`.
+        node (int): The node to resolve.
+
+    Returns:
+        list: Sorted indices of all dependencies.
+    """
+    stack, seen = list(graph[node]), set()
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        stack.extend(graph[current])
+    return sorted(seen)
+
+
+async def run_dependency_graph(graph: dict, worker, max_concurrency: int = 4) -> dict:
+    """
+    Run a coroutine for every node of a dependency graph, respecting its edges.
+
+    Independent nodes run concurrently up to `max_concurrency`; a node only starts once
+    every node it depends on has finished.
+
+    Args:
+        graph (dict): Maps each node to the set of nodes it depends on.
+        worker: Async callable taking a node and returning its result.
+        max_concurrency (int): Maximum number of workers running at once.
+
+    Returns:
+        dict: Maps each node to the value returned by `worker`.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    remaining = {node: set(deps) for node, deps in graph.items()}
+    dependents = {node: set() for node in graph}
+    for node, deps in graph.items():
+        for dep in deps:
+            dependents[dep].add(node)
+
+    results = {}
+
+    async def run(node):
+        async with semaphore:
+            return node, await worker(node)
+
+    running = {asyncio.create_task(run(node)) for node in sorted(graph) if not remaining[node]}
+    try:
+        while running:
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                node, result = task.result()
+                results[node] = result
+                for dependent in sorted(dependents[node]):
+                    remaining[dependent].discard(node)
+                    if not remaining[dependent] and dependent not in results:
+                        running.add(asyncio.create_task(run(dependent)))
+    except BaseException:
+        for task in running:
+            task.cancel()
+        raise
+
+    if len(results) != len(graph):
+        raise ValueError("Dependency graph contains a cycle.")
+    return results
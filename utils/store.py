@@ -0,0 +1,208 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tree (
+    position INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tree_path ON tree (path);
+CREATE TABLE IF NOT EXISTS file_versions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    run_id INTEGER,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS file_versions_path ON file_versions (path, id);
+CREATE TABLE IF NOT EXISTS validations (
+    path TEXT PRIMARY KEY,
+    valid INTEGER NOT NULL,
+    message TEXT NOT NULL DEFAULT '',
+    content_hash TEXT,
+    checked REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS build_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session TEXT,
+    started REAL NOT NULL,
+    finished REAL,
+    status TEXT NOT NULL DEFAULT 'running',
+    files INTEGER NOT NULL DEFAULT 0,
+    generated INTEGER NOT NULL DEFAULT 0,
+    reused INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class ProjectStore:
+    """
+    Embedded SQLite store for the state of one project: its tree, the versions of
+    the generated files, validation results and build runs.
+
+    Every write is a transaction, so a crash never leaves half-written state, and
+    rows are updated individually instead of rewriting the whole project state.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # One connection shared by the event loop and worker threads, serialized by a lock
+        self.connection = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+            # Databases created before failed files were counted lack the column
+            columns = {row["name"] for row in self.connection.execute("PRAGMA table_info(build_runs)")}
+            if "failed" not in columns:
+                self.connection.execute("ALTER TABLE build_runs ADD COLUMN failed INTEGER NOT NULL DEFAULT 0")
+
+    def _write(self, statements):
+        """
+        Execute (sql, parameters) pairs in one transaction.
+
+        Returns:
+            sqlite3.Cursor: The cursor of the last statement.
+        """
+        with self.lock:
+            cursor = None
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, parameters in statements:
+                    cursor = self.connection.execute(sql, parameters)
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+            return cursor
+
+    def _read(self, sql: str, parameters=()) -> list:
+        with self.lock:
+            return [dict(row) for row in self.connection.execute(sql, parameters)]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    # --- Project tree ---
+
+    def set_tree(self, tree: list):
+        """
+        Replace the project tree.
+
+        Args:
+            tree (list): Dictionaries with 'path' and 'description'.
+        """
+        statements = [("DELETE FROM tree", ())]
+        statements += [
+            ("INSERT INTO tree (position, path, description) VALUES (?, ?, ?)",
+             (position, item["path"], item["description"]))
+            for position, item in enumerate(tree)
+        ]
+        self._write(statements)
+
+    def load_tree(self) -> list:
+        """
+        Return the project tree in its original order.
+        """
+        return self._read("SELECT path, description FROM tree ORDER BY position")
+
+    # --- File versions ---
+
+    def record_version(self, path: str, content: str, run_id: int = None):
+        """
+        Record a generated version of a file, unless its content didn't change.
+        """
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        latest = self.latest_version(path)
+        if latest is not None and latest["content_hash"] == digest:
+            return
+        self._write([(
+            "INSERT INTO file_versions (path, content_hash, size, run_id, created) VALUES (?, ?, ?, ?, ?)",
+            (path, digest, len(data), run_id, time.time()),
+        )])
+
+    def latest_version(self, path: str):
+        """
+        Return the latest recorded version of a file, or None.
+        """
+        rows = self._read(
+            "SELECT path, content_hash, size, run_id, created FROM file_versions "
+            "WHERE path = ? ORDER BY id DESC LIMIT 1",
+            (path,),
+        )
+        return rows[0] if rows else None
+
+    def versions(self, path: str) -> list:
+        """
+        Return every recorded version of a file, oldest first.
+        """
+        return self._read(
+            "SELECT path, content_hash, size, run_id, created FROM file_versions WHERE path = ? ORDER BY id",
+            (path,),
+        )
+
+    # --- Validation results ---
+
+    def set_validations(self, results: list):
+        """
+        Insert or update validation results.
+
+        Args:
+            results (list): Dictionaries with 'path', 'valid', and optionally
+                'message' and 'content_hash'.
+        """
+        now = time.time()
+        self._write([
+            (
+                "INSERT INTO validations (path, valid, message, content_hash, checked) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET valid = excluded.valid, message = excluded.message, "
+                "content_hash = excluded.content_hash, checked = excluded.checked",
+                (result["path"], int(bool(result["valid"])), result.get("message", ""),
+                 result.get("content_hash"), now),
+            )
+            for result in results
+        ])
+
+    def validations(self) -> dict:
+        """
+        Return the validation results keyed by path.
+        """
+        rows = self._read("SELECT path, valid, message, content_hash, checked FROM validations")
+        return {row["path"]: dict(row, valid=bool(row["valid"])) for row in rows}
+
+    # --- Build runs ---
+
+    def start_run(self, session: str = None, files: int = 0) -> int:
+        """
+        Record the start of a build and return its id.
+        """
+        cursor = self._write([
+            ("INSERT INTO build_runs (session, started, files) VALUES (?, ?, ?)", (session, time.time(), files)),
+        ])
+        return cursor.lastrowid
+
+    def finish_run(self, run_id: int, status: str, generated: int = 0, reused: int = 0, failed: int = 0):
+        """
+        Record the outcome of a build.
+        """
+        self._write([(
+            "UPDATE build_runs SET finished = ?, status = ?, generated = ?, reused = ?, failed = ? WHERE id = ?",
+            (time.time(), status, generated, reused, failed, run_id),
+        )])
+
+    def runs(self, limit: int = 20) -> list:
+        """
+        Return the most recent build runs, newest first.
+        """
+        return self._read("SELECT * FROM build_runs ORDER BY id DESC LIMIT ?", (limit,))
@@ -0,0 +1,91 @@
+import re
+
+FENCED_BLOCK = re.compile(r"```(?:\w+\n)?(.*?)```", re.DOTALL)
+
+
+class FencedBlockStream:
+    """
+    Incrementally collect fenced code blocks from a streamed LLM response.
+
+    Blocks are matched exactly like `extract_markdown_code` does on the full
+    output, so the text returned by `code` converges to its final result.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.blocks = []
+        self._fences = 0
+
+    def feed(self, chunk: str) -> list:
+        """
+        Append a chunk of the response.
+
+        Args:
+            chunk (str): The next piece of streamed text.
+
+        Returns:
+            list: The code blocks completed by this chunk, if any.
+        """
+        self.text += chunk
+        fences = self.text.count("```")
+        if fences == self._fences:
+            return []
+        self._fences = fences
+        # Only rescan when a fence was closed
+        blocks = [block.strip() for block in FENCED_BLOCK.findall(self.text) if block.strip()]
+        completed = blocks[len(self.blocks):]
+        self.blocks = blocks
+        return completed
+
+    @property
+    def code(self) -> str:
+        """
+        The completed blocks joined the same way `extract_markdown_code` joins them.
+        """
+        return "\n\n".join(self.blocks)
+
+
+TAGGED_BLOCK = re.compile(r"```([^\n`]*)\n(.*?)```", re.DOTALL)
+
+
+def _path_key(path: str) -> str:
+    """
+    Normalize a file path for matching: no leading "./" and no output folder prefix.
+    """
+    path = path.strip().strip("`*'\":").replace("\\", "/")
+    while path.startswith("./"):
+        path = path[2:]
+    while path.startswith("generated/"):
+        path = path[len("generated/"):]
+    return path
+
+
+def split_path_blocks(text: str, paths: list) -> dict:
+    """
+    Split a response holding several files into the content of each file.
+
+    Generalizes `extract_markdown_code` to multi-file responses: each fenced
+    block is attributed to a file by the path in its info string (e.g.
+    ```src/__init__.py) or, failing that, by a path on the line just before
+    the opening fence.
+
+    Args:
+        text (str): The LLM response.
+        paths (list): The requested file paths.
+
+    Returns:
+        dict: Maps each requested path found in the response to its stripped
+              content. Missing paths are absent.
+    """
+    keys = {_path_key(path): path for path in paths}
+    files = {}
+    for match in TAGGED_BLOCK.finditer(text):
+        candidates = match.group(1).split()
+        preceding = text[:match.start()].rstrip("\n").rsplit("\n", 1)[-1]
+        candidates += preceding.split()
+        for candidate in candidates:
+            key = _path_key(candidate.split("=", 1)[-1])
+            if key in keys and keys[key] not in files:
+                files[keys[key]] = match.group(2).strip()
+                break
+    return files
@@ -0,0 +1,173 @@
+import os
+import re
+import ast
+
+# Longest constant value copied verbatim into a stub
+MAX_CONSTANT_LENGTH = 60
+
+JS_EXTENSIONS = {".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx"}
+HTML_EXTENSIONS = {".html", ".htm"}
+
+JS_PATTERNS = [
+    re.compile(r"^\s*(?:export\s+(?:default\s+)?)?(?:async\s+)?function\s*\*?\s*\w+\s*\([^)]*\)", re.MULTILINE),
+    re.compile(r"^\s*(?:export\s+(?:default\s+)?)?class\s+\w+(?:\s+extends\s+[\w.]+)?", re.MULTILINE),
+    re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+\w+\s*=\s*(?:async\s+)?(?:\([^)]*\)|\w+)\s*=>", re.MULTILINE),
+    re.compile(r"^\s*export\s+(?:const|let|var)\s+[A-Z_][A-Z0-9_]*\s*=\s*[^;\n]{0,60}", re.MULTILINE),
+    re.compile(r"^\s*(?:export\s+\{[^}]*\}|module\.exports\s*=\s*[^;\n]{0,120})", re.MULTILINE),
+    re.compile(r"^\s*(?:import\s+[^;\n]+from\s+['\"][^'\"]+['\"]|(?:const|let|var)\s+[^=\n]+=\s*require\([^)]*\))", re.MULTILINE),
+]
+HTML_PATTERNS = [
+    re.compile(r"<title>[^<]*</title>", re.IGNORECASE),
+    re.compile(r"<(?:script|img)\b[^>]*\bsrc=[\"'][^\"']+[\"'][^>]*>", re.IGNORECASE),
+    re.compile(r"<link\b[^>]*\bhref=[\"'][^\"']+[\"'][^>]*>", re.IGNORECASE),
+    re.compile(r"<form\b[^>]*>", re.IGNORECASE),
+    re.compile(r"<\w+\b[^>]*\bid=[\"'][^\"']+[\"'][^>]*>", re.IGNORECASE),
+    re.compile(r"\{%\s*(?:extends|include|block)\b[^%]*%\}"),
+]
+
+
+def _first_line(docstring: str) -> str:
+    """
+    Return the first non-empty line of a docstring.
+    """
+    for line in (docstring or "").strip().splitlines():
+        if line.strip():
+            return line.strip()
+    return ""
+
+
+def _signature(node) -> str:
+    """
+    Render the signature line of a function definition.
+    """
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    return f"{prefix} {node.name}({ast.unparse(node.args)}){returns}: ..."
+
+
+def _python_stub(code: str) -> list:
+    """
+    Extract the public interface of a Python module.
+    """
+    tree = ast.parse(code)
+    lines = []
+    docstring = _first_line(ast.get_docstring(tree))
+    if docstring:
+        lines.append(f'"""{docstring}"""')
+
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            lines.append(ast.unparse(node))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and not node.name.startswith("_"):
+            lines.extend(f"@{ast.unparse(decorator)}" for decorator in node.decorator_list)
+            lines.append(_signature(node))
+            if _first_line(ast.get_docstring(node)):
+                lines.append(f'    """{_first_line(ast.get_docstring(node))}"""')
+        elif isinstance(node, ast.ClassDef) and not node.name.startswith("_"):
+            bases = ", ".join(ast.unparse(base) for base in node.bases + node.keywords)
+            lines.append(f"class {node.name}({bases}):" if bases else f"class {node.name}:")
+            if _first_line(ast.get_docstring(node)):
+                lines.append(f'    """{_first_line(ast.get_docstring(node))}"""')
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and (
+                    not item.name.startswith("_") or item.name == "__init__"
+                ):
+                    lines.append(f"    {_signature(item)}")
+                elif isinstance(item, (ast.Assign, ast.AnnAssign)):
+                    lines.append(f"    {ast.unparse(item).splitlines()[0]}")
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names = [ast.unparse(target) for target in targets]
+            if not any(name.isupper() or name == "__all__" for name in names):
+                continue
+            value = ast.unparse(node.value) if node.value is not None else ""
+            if len(value) > MAX_CONSTANT_LENGTH:
+                value = "..."
+            lines.append(f"{' = '.join(names)} = {value}" if value else ast.unparse(node))
+    return lines
+
+
+def _pattern_stub(code: str, patterns: list) -> list:
+    """
+    Collect the lines matched by a list of regex patterns, in source order.
+    """
+    matches = []
+    for pattern in patterns:
+        matches.extend((match.start(), match.group(0).strip()) for match in pattern.finditer(code))
+    seen, lines = set(), []
+    for _, line in sorted(matches):
+        if line not in seen:
+            seen.add(line)
+            lines.append(line)
+    return lines
+
+
+def extract_stub(path: str, code: str):
+    """
+    Build a compact interface stub for a generated file.
+
+    Args:
+        path (str): The file path, used to pick the parser.
+        code (str): The file content.
+
+    Returns:
+        str: The stub, or None when the file type has no stub representation
+             and the full content should be used instead.
+    """
+    _, extension = os.path.splitext(path.lower())
+    try:
+        if extension == ".py":
+            lines = _python_stub(code)
+        elif extension in JS_EXTENSIONS:
+            lines = _pattern_stub(code, JS_PATTERNS)
+        elif extension in HTML_EXTENSIONS:
+            lines = _pattern_stub(code, HTML_PATTERNS)
+        else:
+            return None
+    except (SyntaxError, ValueError):
+        # Unparseable Python still exposes its definitions line by line
+        lines = [line.rstrip() + " ..." for line in code.splitlines()
+                 if re.match(r"\s*(?:async\s+def|def|class)\s+[A-Za-z]", line)]
+
+    return "\n".join([f"# module: {path}"] + lines)
+
+
+class SymbolIndex:
+    """
+    Incremental index of interface stubs for the files generated so far.
+    """
+
+    def __init__(self):
+        self.stubs = {}
+
+    def update(self, path: str, code: str):
+        """
+        Re-index a file after it has been saved.
+
+        Args:
+            path (str): The file path.
+            code (str): The new file content.
+        """
+        self.stubs[path] = extract_stub(path, code)
+
+    def remove(self, path: str):
+        """
+        Drop a file from the index.
+        """
+        self.stubs.pop(path, None)
+
+    def stub(self, path: str, code: str = None):
+        """
+        Return the stub of an indexed file.
+
+        Args:
+            path (str): The file path.
+            code (str): Fallback content returned when the file has no stub.
+
+        Returns:
+            str: The stub, or `code` if none is available or it isn't smaller.
+        """
+        stub = self.stubs.get(path)
+        if stub is None or (code is not None and len(stub) >= len(code)):
+            return code
+        return stub
@@ -0,0 +1,233 @@
+import os
+import sys
+import ast
+import json
+import hashlib
+
+# Worker processes for validation; 0 validates in the calling process
+VALIDATION_WORKERS = int(os.getenv("VALIDATION_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Below this many files to check, a process pool costs more than it saves
+POOL_MIN_FILES = 16
+# Bump when checks change, so cached results are recomputed
+CHECKS_VERSION = "1"
+
+DOCKERFILE_INSTRUCTIONS = {
+    "ADD", "ARG", "CMD", "COPY", "ENTRYPOINT", "ENV", "EXPOSE", "FROM", "HEALTHCHECK", "LABEL",
+    "MAINTAINER", "ONBUILD", "RUN", "SHELL", "STOPSIGNAL", "USER", "VOLUME", "WORKDIR",
+}
+
+_pool = None
+
+
+def module_names(paths) -> set:
+    """
+    Collect the Python modules and packages a set of project files can be imported as.
+
+    The import root of generated projects isn't known (e.g. the project folder or
+    `src`), so every suffix of each dotted path counts as a module name.
+
+    Args:
+        paths: File paths relative to the project folder.
+
+    Returns:
+        set: Dotted module and package names.
+    """
+    names = set()
+    for path in paths:
+        parts = [part for part in path.replace("\\", "/").split("/") if part not in ("", ".")]
+        if not parts or not parts[-1].endswith(".py"):
+            continue
+        parts[-1] = parts[-1][:-3]
+        if parts[-1] == "__init__":
+            parts.pop()
+        for start in range(len(parts)):
+            for end in range(start + 1, len(parts) + 1):
+                names.add(".".join(parts[start:end]))
+    return names
+
+
+def _resolve_relative(path: str, module: str, level: int) -> str:
+    """
+    Turn a relative import of the file at `path` into a dotted name.
+    """
+    parts = [part for part in path.replace("\\", "/").split("/") if part not in ("", ".")][:-1]
+    if level > 1:
+        parts = parts[: len(parts) - (level - 1)]
+    if module:
+        parts.append(module)
+    return ".".join(parts)
+
+
+def check_python(path: str, content: str, modules: set):
+    """
+    Compile a Python file and check that its project imports resolve.
+
+    Returns:
+        str: A description of the problem, or None if the file is valid.
+    """
+    try:
+        tree = ast.parse(content, filename=path)
+        compile(tree, path, "exec")
+    except (SyntaxError, ValueError) as e:
+        return f"{type(e).__name__}: {e}"
+
+    # Project files shadowing the standard library (e.g. utils/logging.py) aren't checked
+    project_roots = {name.split(".")[0] for name in modules} - set(getattr(sys, "stdlib_module_names", ()))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            targets = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                targets = [_resolve_relative(path, node.module, node.level)]
+            else:
+                targets = [node.module]
+        else:
+            continue
+        for target in targets:
+            # Third-party and standard library imports are not checked
+            if target and target.split(".")[0] in project_roots and target not in modules:
+                return f"ImportError: line {node.lineno}: module '{target}' is not part of the project"
+    return None
+
+
+def check_dockerfile(content: str):
+    """
+    Check that a Dockerfile only uses known instructions and starts with FROM.
+
+    Returns:
+        str: A description of the problem, or None if the file is valid.
+    """
+    instructions = []
+    continued = False
+    for number, line in enumerate(content.splitlines(), start=1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if not continued:
+            instruction = stripped.split()[0].upper()
+            if instruction not in DOCKERFILE_INSTRUCTIONS:
+                return f"Unknown Dockerfile instruction '{stripped.split()[0]}' on line {number}"
+            instructions.append(instruction)
+        continued = stripped.endswith("\\")
+    leading = [instruction for instruction in instructions if instruction != "ARG"]
+    if not leading or leading[0] != "FROM":
+        return "A Dockerfile must start with a FROM instruction"
+    return None
+
+
+def check_file(path: str, content: str, modules: set):
+    """
+    Run the static checks matching a file's type.
+
+    Args:
+        path (str): The file path relative to the project folder.
+        content (str): The file content.
+        modules (set): The project's module names, from `module_names`.
+
+    Returns:
+        str: A description of the problem, or None if the file is valid.
+    """
+    if not content.strip():
+        return "The file is empty"
+    name = os.path.basename(path)
+    _, extension = os.path.splitext(name.lower())
+    try:
+        if extension == ".py":
+            return check_python(path, content, modules)
+        if extension == ".json":
+            json.loads(content)
+        elif extension in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                return None  # PyYAML isn't installed; the file isn't checked
+            list(yaml.safe_load_all(content))
+        elif extension == ".toml":
+            try:
+                import tomllib
+            except ImportError:
+                return None  # Python < 3.11; the file isn't checked
+            tomllib.loads(content)
+        elif name == "Dockerfile" or extension == ".dockerfile":
+            return check_dockerfile(content)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+def _check_batch(batch: list, modules: set) -> list:
+    return [check_file(path, content, modules) for path, content in batch]
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        import multiprocessing  # Only loaded once a pool is needed
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Forking would copy the server's threads and locks (event loop, log queue,
+        # HTTP clients) into the workers; start them from a clean process instead
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(max_workers=VALIDATION_WORKERS, mp_context=multiprocessing.get_context(method))
+    return _pool
+
+
+def validate_files(project_path: str, paths: list, cached: dict = None) -> list:
+    """
+    Validate project files, reusing cached results for unchanged content.
+
+    Args:
+        project_path (str): The project folder.
+        paths (list): File paths relative to the project folder (e.g. "./src/main.py").
+        cached (dict): Previous results keyed by path, with their 'content_hash'.
+
+    Returns:
+        list: One dictionary per path with 'path', 'valid', 'message',
+              'content_hash' and 'cached'.
+    """
+    cached = cached or {}
+    modules = module_names(paths)
+    modules_digest = hashlib.sha256("\n".join(sorted(modules)).encode("utf-8")).hexdigest()
+
+    results, pending = [], []
+    for path in dict.fromkeys(paths):
+        full_path = os.path.join(project_path, path.lstrip("./"))
+        if path.endswith("/"):
+            results.append({"path": path, "valid": os.path.isdir(full_path), "content_hash": None, "cached": False,
+                            "message": "" if os.path.isdir(full_path) else "The directory is missing"})
+            continue
+        try:
+            with open(full_path, "rb") as file:
+                data = file.read()
+        except OSError:
+            results.append({"path": path, "valid": False, "message": "The file is missing",
+                            "content_hash": None, "cached": False})
+            continue
+        digest = hashlib.sha256(data)
+        digest.update(CHECKS_VERSION.encode("utf-8"))
+        if path.endswith(".py"):
+            # Import resolution depends on the other files of the project
+            digest.update(modules_digest.encode("utf-8"))
+        key = digest.hexdigest()
+        previous = cached.get(path)
+        if previous is not None and previous.get("content_hash") == key:
+            results.append({"path": path, "valid": previous["valid"], "message": previous["message"],
+                            "content_hash": key, "cached": True})
+            continue
+        result = {"path": path, "valid": False, "message": "", "content_hash": key, "cached": False}
+        results.append(result)
+        pending.append((result, data.decode("utf-8", errors="replace")))
+
+    batch = [(result["path"], content) for result, content in pending]
+    if VALIDATION_WORKERS > 0 and len(batch) >= POOL_MIN_FILES:
+        size = -(-len(batch) // (VALIDATION_WORKERS * 4))
+        chunks = [batch[start:start + size] for start in range(0, len(batch), size)]
+        futures = [get_pool().submit(_check_batch, chunk, modules) for chunk in chunks]
+        problems = [problem for future in futures for problem in future.result()]
+    else:
+        problems = _check_batch(batch, modules)
+
+    for (result, _), problem in zip(pending, problems):
+        result["valid"] = problem is None
+        result["message"] = problem or ""
+    return results